@@ -0,0 +1,134 @@
+import time
+import threading
+from datetime import datetime
+import pandas as pd
+
+from bigquery.job_manager import JobManager
+from crunchbase.normalizer import cast_to_schema
+from logger import Logger as logger
+
+
+class BatchUploader():
+    """ Collects the rows of a running stage and loads them into BigQuery in batches """
+    # BigQuery allows 1,500 load jobs per table and day, the time flush alone stays below 150
+    batch_rows = 10000
+    flush_seconds = 600
+
+    def __init__(self, client, table_name, schema, job_config, batch_rows=None, flush_seconds=None, clustering_fields=None):
+        """
+        Initializes the uploader and creates the table if needed.
+
+        A batch is loaded as soon as it holds batch_rows rows or its oldest row
+        waited flush_seconds, so dashboards see partial results and a crash only
+        loses the current batch. All rows of one uploader share a dwh_partitiondate.
+
+        Args:
+            client (BigQueryClient): The BigQueryClient object.
+            table_name (str): The name of the table.
+            schema (list): The schema of the table.
+            job_config (bigquery.LoadJobConfig): The job configuration.
+            batch_rows (int, optional): Rows per load job. Defaults to batch_rows.
+            flush_seconds (float, optional): Seconds after which a partial batch is loaded. Defaults to flush_seconds.
+            clustering_fields (list, optional): The clustering of the table if it is created. Defaults to None.
+        """
+        self.client = client
+        self.table_name = table_name
+        self.schema = schema
+        self.job_config = job_config
+        self.batch_rows = batch_rows or self.batch_rows
+        self.flush_seconds = flush_seconds or self.flush_seconds
+        self.partition_date = datetime.now()
+        self.jobs = JobManager()
+        self.rows = []
+        self.frames = []
+        self.pending_rows = 0
+        self.batch_started = None
+        self.uploaded = 0
+        self.failed = 0
+        if not self.client.table_exists(table_name):
+            self.client.create_table(table_name, schema, clustering_fields=clustering_fields)
+        # flushes a batch that waited too long, also while the stage adds no rows
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.timer = threading.Thread(target=self._flush_when_due, daemon=True)
+        self.timer.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _flush_when_due(self):
+        while not self.stopped.wait(min(self.flush_seconds, 1)):
+            with self.lock:
+                if self.batch_started is not None and time.time() - self.batch_started >= self.flush_seconds:
+                    self._flush()
+
+    def add(self, row: dict):
+        """
+        Add a finished row.
+
+        Args:
+            row (dict): The row, keys not in the schema are dropped.
+        """
+        with self.lock:
+            self.rows.append(row)
+            self._added(1)
+
+    def add_dataframe(self, dataframe: pd.DataFrame):
+        """
+        Add finished rows, a large dataframe is loaded at once and only split by size.
+
+        Args:
+            dataframe (pd.DataFrame): The rows.
+        """
+        if dataframe.empty:
+            return
+        with self.lock:
+            self.frames.append(dataframe)
+            self._added(len(dataframe))
+
+    def _added(self, rows: int):
+        if self.batch_started is None:
+            self.batch_started = time.time()
+        self.pending_rows += rows
+        if self.pending_rows >= self.batch_rows:
+            self._flush()
+
+    def flush(self):
+        """ Submit the collected rows as one load job """
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending_rows:
+            return
+        frames = ([pd.DataFrame(self.rows)] if self.rows else []) + self.frames
+        dataframe = pd.concat(frames, ignore_index=True)
+        dataframe['dwh_partitiondate'] = self.partition_date
+        dataframe = cast_to_schema(dataframe, self.schema)
+        if self.client.load_dataframe_in_chunks(dataframe, self.table_name, self.job_config, self.schema, self.jobs):
+            self.uploaded += len(dataframe)
+        else:
+            logger.error(f"Could not upload {len(dataframe)} rows to {self.table_name}")
+        self.rows = []
+        self.frames = []
+        self.pending_rows = 0
+        self.batch_started = None
+        # report failed loads while the stage is still running instead of only at the end
+        failed = self.jobs.collect()
+        if failed:
+            self.failed += failed
+            logger.error(f"{failed} load jobs to {self.table_name} failed")
+
+    def close(self):
+        """ Submit the last rows and wait for all load jobs """
+        self.stopped.set()
+        self.timer.join()
+        self.flush()
+        if self.jobs.jobs:
+            self.failed += self.jobs.wait()["failed"]
+        if self.failed:
+            logger.error(f"{self.failed} load jobs to {self.table_name} failed")
+        logger.info(f"Sent {self.uploaded} rows to {self.table_name}")
@@ -1,26 +1,46 @@
+import io
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import os
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
 from google.auth.exceptions import DefaultCredentialsError
 from google.api_core.exceptions import GoogleAPIError
 from google.oauth2.service_account import Credentials
-from helpers.decorators import retry
+from bigquery.job_manager import JobManager
+from bigquery.query_cache import QueryCache
+from bigquery.schemes.schema_helpers import to_arrow_schema
+from helpers.decorators import FatalError, retry
 from logger import Logger as logger
 
 
+class FullScanError(FatalError):
+    """ A query would scan a whole partitioned table """
+
+
 class BigQueryClient():
     """ BigQuery client. """
     max_retries = 5
-    retry_delay = 10
+    retry_delay = 2
+    load_chunk_mb = 64
+    # "warn", "reject" or "off" for queries that read most of a partitioned table without require_partition_filter
+    scan_guard = "off"
+    full_scan_ratio = 0.5
 
-    def __init__(self, project_id, dataset_name):
+    def __init__(self, project_id, dataset_name, load_chunk_mb=None, cache_dir=None, scan_guard=None):
         """
         Initialize the BigQueryClient.
 
         Args:
             project_id (str): The project id.
             dataset_name (str): The dataset name.
+            load_chunk_mb (int, optional): Upper bound of the data sent per load job. Defaults to load_chunk_mb.
+            cache_dir (str, optional): Folder for cached query results, None disables the cache. Defaults to None.
+            scan_guard (str, optional): "warn", "reject" or "off" for full scans of partitioned tables. Defaults to scan_guard.
         """
         self.project_id = project_id
         self.dataset_name = dataset_name
@@ -29,6 +49,9 @@ class BigQueryClient():
         self.expiration_time = 1000 * 60 * 60 * 24 * 30
         self.max_retries = 5
         self.sleep_amount = 10
+        self.load_chunk_bytes = (load_chunk_mb or self.load_chunk_mb) * 1024 * 1024
+        self.query_cache = QueryCache(cache_dir) if cache_dir else None
+        self.scan_guard = scan_guard or self.scan_guard
 
         try:
             private_key = os.getenv('GOOGLE_PRIVATE_KEY')
@@ -125,13 +148,18 @@ class BigQueryClient():
             return False
 
     @retry(max_retries, retry_delay)
-    def create_table(self, table_name, schema) -> bigquery.Table:
+    def create_table(self, table_name, schema, expire_partitions=True, clustering_fields=None,
+                     require_partition_filter=True) -> bigquery.Table:
         """
         Create a table in BigQuery.
 
         Args:
             table_name (str): The name of the table.
             schema (list): The schema of the table.
+            expire_partitions (bool, optional): Drop partitions after expiration_time. Defaults to True.
+            clustering_fields (list, optional): Up to four columns to cluster each partition by. Defaults to None.
+            require_partition_filter (bool, optional): Let BigQuery reject queries without a filter on
+                dwh_partitiondate. Defaults to True.
 
         Returns:
             bigquery.Table: The created table.
@@ -143,8 +171,10 @@ class BigQueryClient():
             table.time_partitioning = bigquery.TimePartitioning(
                 type_=bigquery.TimePartitioningType.HOUR,
                 field="dwh_partitiondate",
-                expiration_ms=self.expiration_time,
+                expiration_ms=self.expiration_time if expire_partitions else None,
             )
+            table.clustering_fields = clustering_fields
+            table.require_partition_filter = require_partition_filter
             bq_table = self.client.create_table(table)
             return bq_table
         except GoogleAPIError as e:
@@ -192,6 +222,200 @@ class BigQueryClient():
         except GoogleAPIError as e:
             logger.error(f"Google API Error (load_table_from_dataframe): {e}")
 
+    @retry(max_retries, retry_delay)
+    def load_table_from_file(self, file_obj, table_name, job_config) -> bigquery.LoadJob:
+        """
+        Load a file into a table in BigQuery.
+
+        Args:
+            file_obj (io.BytesIO): The file, it is rewound before every attempt.
+            table_name (str): The name of the table.
+            job_config (bigquery.LoadJobConfig): The job configuration.
+
+        Returns:
+            bigquery.LoadJob: The load job.
+        """
+        try:
+            table_id = "{}.{}".format(self.dataset_refstring, table_name)
+            job = self.client.load_table_from_file(
+                file_obj,
+                table_id,
+                rewind=True,
+                job_config=job_config
+            )
+            return job
+        except GoogleAPIError as e:
+            logger.error(f"Google API Error (load_table_from_file): {e}")
+
+    def load_dataframe_in_chunks(self, dataframe, table_name, job_config, schema, job_manager=None) -> bool:
+        """
+        Load a dataframe as typed Parquet, split into load jobs of at most load_chunk_bytes.
+
+        All chunks are sent first and awaited afterwards, so BigQuery processes a
+        chunk while the next one is uploaded. With a job manager the jobs are only
+        submitted, so several tables can load at the same time.
+
+        Args:
+            dataframe (pandas.DataFrame): The dataframe to load.
+            table_name (str): The name of the table.
+            job_config (bigquery.LoadJobConfig): The job configuration, its source format must be PARQUET.
+            schema (list): The BigQuery schema giving the column types.
+            job_manager (JobManager, optional): Track the jobs there instead of waiting for them. Defaults to None.
+
+        Returns:
+            bool: True if all chunks were loaded (or submitted), False otherwise.
+        """
+        fields = [field for field in schema if field.name in dataframe.columns]
+        arrow_schema = to_arrow_schema(fields)
+        table = pa.Table.from_pandas(dataframe[arrow_schema.names], preserve_index=False)
+        table = table.cast(arrow_schema, safe=False)
+        if table.num_rows == 0:
+            logger.info("Dataframe is empty")
+            return True
+        rows_per_chunk = max(1, int(self.load_chunk_bytes / max(1, table.nbytes / table.num_rows)))
+        manager = job_manager or JobManager()
+
+        _s_time = time.time()
+        chunks = 0
+        sent_bytes = 0
+        for offset in range(0, table.num_rows, rows_per_chunk):
+            buffer = io.BytesIO()
+            pq.write_table(table.slice(offset, rows_per_chunk), buffer, compression="snappy")
+            sent_bytes += buffer.tell()
+            job = self.load_table_from_file(buffer, table_name, job_config)
+            if job is None:
+                return False
+            chunks += 1
+            manager.submit(table_name, job)
+        _u_time = time.time() - _s_time
+        logger.info(
+            f"Sent {table.num_rows} rows in {chunks} chunks to {table_name}: "
+            f"{sent_bytes / max(_u_time, 1e-6) / 1024 / 1024:.1f} MB/s"
+        )
+        if job_manager is not None:
+            return True
+
+        summary = manager.wait()
+        _e_time = time.time() - _s_time
+        logger.info(f"Loaded {table.num_rows} rows into {table_name}: {table.num_rows / max(_e_time, 1e-6):.0f} rows/s")
+        return summary["failed"] == 0
+
+    @retry(max_retries, retry_delay)
+    def create_staging_table(self, table_name, schema) -> bigquery.Table:
+        """
+        Create a temporary table that expires after a day, even if it is never deleted.
+
+        Args:
+            table_name (str): The name of the table the staging table is created for.
+            schema (list): The schema of the table.
+
+        Returns:
+            bigquery.Table: The created table.
+        """
+        try:
+            table_id = "{}.{}_staging_{}".format(self.dataset_refstring, table_name, uuid.uuid4().hex[:8])
+            table = bigquery.Table(table_id, schema=schema)
+            table.expires = datetime.now(timezone.utc) + timedelta(days=1)
+            return self.client.create_table(table)
+        except GoogleAPIError as e:
+            logger.error(f"Google API Error (create_staging_table): {e}")
+
+    def upsert_dataframe(self, dataframe, table_name, job_config, schema, key="UUID", clustering_fields=None) -> bool:
+        """
+        Upsert a dataframe into a table: load it into a staging table and MERGE it on the key.
+
+        Rows are only updated if their content changed. The content hash leaves out
+        dwh_partitiondate, so it holds the time of the last change of a row.
+
+        Args:
+            dataframe (pandas.DataFrame): The dataframe to upsert.
+            table_name (str): The name of the table, it is created without partition expiration if needed.
+            job_config (bigquery.LoadJobConfig): The job configuration for loading the staging table.
+            schema (list): The schema of the table.
+            key (str, optional): The column identifying a row. Defaults to "UUID".
+            clustering_fields (list, optional): The clustering of the table if it is created. Defaults to None.
+
+        Returns:
+            bool: True if the merge succeeded, False otherwise.
+        """
+        if dataframe.empty:
+            logger.info("Dataframe is empty")
+            return True
+        if not self.table_exists(table_name):
+            # the MERGE reads every partition of the table
+            self.create_table(table_name, schema, expire_partitions=False, clustering_fields=clustering_fields,
+                              require_partition_filter=False)
+        staging = self.create_staging_table(table_name, schema)
+        if staging is None:
+            return False
+        try:
+            if not self.load_dataframe_in_chunks(dataframe, staging.table_id, job_config, schema):
+                return False
+            query_job = self.execute_query(self.merge_query(table_name, staging.table_id, schema, key))
+            if query_job is None:
+                return False
+            query_job.result()
+            logger.info(f"Merged {len(dataframe)} rows into {table_name}, {query_job.num_dml_affected_rows} rows inserted or changed")
+            return True
+        except GoogleAPIError as e:
+            logger.error(f"Google API Error (upsert_dataframe): {e}")
+            return False
+        finally:
+            self.delete_table(staging.table_id)
+
+    def merge_query(self, table_name, staging_name, schema, key="UUID") -> str:
+        """
+        Build the MERGE statement of upsert_dataframe.
+
+        Args:
+            table_name (str): The name of the target table.
+            staging_name (str): The name of the staging table.
+            schema (list): The schema of both tables.
+            key (str, optional): The column identifying a row. Defaults to "UUID".
+
+        Returns:
+            str: The query.
+        """
+        columns = [field.name for field in schema]
+        content = [column for column in columns if column != "dwh_partitiondate"]
+
+        return """
+            MERGE INTO `{target}` T
+            USING (
+                SELECT * FROM `{staging}` S
+                WHERE TRUE
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY S.{key} ORDER BY S.dwh_partitiondate DESC) = 1
+            ) S
+            ON T.{key} = S.{key}
+            WHEN MATCHED AND {target_hash} != {staging_hash} THEN
+                UPDATE SET {updates}
+            WHEN NOT MATCHED THEN
+                INSERT ({columns}) VALUES ({values})
+            """.format(
+            target="{}.{}".format(self.dataset_refstring, table_name),
+            staging="{}.{}".format(self.dataset_refstring, staging_name),
+            key=key,
+            target_hash=self.row_hash("T", content),
+            staging_hash=self.row_hash("S", content),
+            updates=", ".join("{0} = S.{0}".format(column) for column in columns),
+            columns=", ".join(columns),
+            values=", ".join("S.{}".format(column) for column in columns),
+        )
+
+    def row_hash(self, alias, columns) -> str:
+        """
+        Build the SQL expression hashing the content of a row.
+
+        Args:
+            alias (str): The alias of the table.
+            columns (list): The columns to hash.
+
+        Returns:
+            str: The expression.
+        """
+        fields = ", ".join("{}.{}".format(alias, column) for column in columns)
+        return "FARM_FINGERPRINT(TO_JSON_STRING(STRUCT({})))".format(fields)
+
     @retry(max_retries, retry_delay)
     def delete_table(self, table_name):
         """
@@ -206,6 +430,28 @@ class BigQueryClient():
         except GoogleAPIError as e:
             logger.error(f"Google API Error (delete_table): {e}")
 
+    def delete_partition(self, table_name, partition_date) -> int:
+        """
+        Delete the rows of one run, e.g. the partial load of a failed run.
+
+        Args:
+            table_name (str): The name of the table.
+            partition_date (datetime): The dwh_partitiondate of the run.
+
+        Returns:
+            int: The number of deleted rows.
+        """
+        query_job = self.execute_query(
+            """
+            DELETE FROM `{}.{}`
+            WHERE dwh_partitiondate = DATETIME("{}")
+            """.format(self.dataset_refstring, table_name, partition_date.strftime("%Y-%m-%d %H:%M:%S.%f"))
+        )
+        query_job.result()
+        deleted = query_job.num_dml_affected_rows or 0
+        logger.info(f"Deleted {deleted} rows of {partition_date} from {table_name}")
+        return deleted
+
     @retry(max_retries, retry_delay)
     def create_view(self, query, view_name):
         """
@@ -255,13 +501,73 @@ class BigQueryClient():
         except GoogleAPIError as e:
             logger.error(f"Google API Error (execute_query): {e}")
 
+    def dry_run(self, query) -> bigquery.QueryJob:
+        """
+        Validate a query without running it, which is free.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            bigquery.QueryJob: The dry run job with referenced_tables and total_bytes_processed.
+        """
+        try:
+            job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+            return self.client.query(query, job_config=job_config)
+        except GoogleAPIError as e:
+            logger.warning(f"Google API Error (dry_run): {e}")
+
+    def check_full_scan(self, dry_run, tables):
+        """
+        Warn about or reject a query that reads most of a partitioned table.
+
+        Tables created by create_table require a partition filter, BigQuery itself
+        rejects unfiltered queries on them. This guard covers older tables without it.
+
+        Args:
+            dry_run (bigquery.QueryJob): The dry run of the query.
+            tables (list): The referenced tables.
+
+        Raises:
+            FullScanError: If scan_guard is "reject" and the query scans a whole partitioned table.
+        """
+        bytes_processed = dry_run.total_bytes_processed or 0
+        for table in tables:
+            if table.time_partitioning is None or table.require_partition_filter or not table.num_bytes:
+                continue
+            if bytes_processed >= table.num_bytes * self.full_scan_ratio:
+                message = (f"Query scans {bytes_processed / 1024 / 1024:.1f} MB of {table.table_id} "
+                           f"({table.num_bytes / 1024 / 1024:.1f} MB), add a filter on its partition column")
+                if self.scan_guard == "reject":
+                    raise FullScanError(message)
+                logger.warning(message)
+
+    def table_versions(self, tables) -> list:
+        """
+        Get the modification time of every table a query reads.
+
+        Args:
+            tables (list): The referenced tables.
+
+        Returns:
+            list: (table id, modification time) pairs.
+        """
+        return [(table.full_table_id, table.modified.isoformat()) for table in tables]
+
     @retry(max_retries, retry_delay)
-    def get_dataframe(self, query):
+    def get_dataframe(self, query, use_cache=True, guard=True):
         """
         Get a dataframe from a query.
 
+        The result is fetched as Arrow, through the BigQuery Storage API if it is
+        installed. With a query cache, results are stored on disk and reused until
+        one of the queried tables is modified.
+
         Args:
             query (str): The query to execute.
+            use_cache (bool, optional): Use the query cache if there is one. Defaults to True.
+            guard (bool, optional): Check the query with the scan guard if scan_guard is not "off".
+                Without cache and guard no dry run is needed. Defaults to True.
 
         Returns:
             pandas.DataFrame: The dataframe.
@@ -269,12 +575,103 @@ class BigQueryClient():
         try:
             logger.debug("Query")
             logger.debug(query)
+            key = None
+            use_cache = self.query_cache is not None and use_cache
+            guard = guard and self.scan_guard != "off"
+            dry_run = self.dry_run(query) if use_cache or guard else None
+            # queries without referenced tables, e.g. on INFORMATION_SCHEMA, are neither guarded nor cached
+            if dry_run is not None and dry_run.referenced_tables:
+                tables = [self.client.get_table(reference) for reference in dry_run.referenced_tables]
+                if guard:
+                    self.check_full_scan(dry_run, tables)
+                if use_cache:
+                    key = self.query_cache.key(query, self.table_versions(tables))
+                    cached = self.query_cache.get(key)
+                    if cached is not None:
+                        logger.debug(f"Query result read from cache ({key})")
+                        return cached.to_pandas()
             query_job = self.client.query(query)
-            query_job.result()
-            return query_job.to_dataframe()
+            result = query_job.result().to_arrow(create_bqstorage_client=True)
+            if key:
+                self.query_cache.put(key, result)
+            return result.to_pandas()
         except GoogleAPIError as e:
             logger.error(f"Google API Error (get_dataframe): {e}")
 
+    def latest_partition(self, table_name) -> datetime:
+        """
+        Get the start of the newest partition of a table from INFORMATION_SCHEMA.PARTITIONS.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            datetime: The start of the newest HOUR partition, None if the table has none.
+        """
+        query_job = self.execute_query(
+            """
+            SELECT MAX(partition_id) AS partition_id
+            FROM `{}.INFORMATION_SCHEMA.PARTITIONS`
+            WHERE table_name = "{}"
+            AND partition_id NOT IN ("__NULL__", "__UNPARTITIONED__")
+            AND total_rows > 0
+            """.format(self.dataset_refstring, table_name)
+        )
+        if query_job is None:
+            return None
+        rows = list(query_job.result())
+        if not rows or rows[0].partition_id is None:
+            return None
+        return datetime.strptime(rows[0].partition_id, "%Y%m%d%H")
+
+    def latest_snapshot_query(self, table_name, columns=None, where=None) -> str:
+        """
+        Build a query for the latest run in a table, filtered on its newest partition only.
+
+        Args:
+            table_name (str): The name of the table.
+            columns (list, optional): The columns to select. Defaults to all columns.
+            where (str, optional): An additional filter, e.g. 'Country = "Germany"'. Defaults to None.
+
+        Returns:
+            str: The query, None if the table has no partitions.
+        """
+        start = self.latest_partition(table_name)
+        if start is None:
+            return None
+        table_id = "`{}.{}`".format(self.dataset_refstring, table_name)
+        partition_filter = 'dwh_partitiondate >= DATETIME("{}") AND dwh_partitiondate < DATETIME("{}")'.format(
+            start.strftime("%Y-%m-%d %H:%M:%S"), (start + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S"))
+        return """
+            SELECT {columns} FROM {table_id}
+            WHERE {partition_filter}
+            AND dwh_partitiondate = (SELECT MAX(dwh_partitiondate) FROM {table_id} WHERE {partition_filter})
+            {where}
+            """.format(
+            columns=", ".join(columns) if columns else "*",
+            table_id=table_id,
+            partition_filter=partition_filter,
+            where="AND ({})".format(where) if where else "",
+        )
+
+    def get_latest_snapshot(self, table_name, columns=None, where=None) -> pd.DataFrame:
+        """
+        Get the latest run in a table without scanning older partitions.
+
+        Args:
+            table_name (str): The name of the table.
+            columns (list, optional): The columns to select. Defaults to all columns.
+            where (str, optional): An additional filter, e.g. 'Country = "Germany"'. Defaults to None.
+
+        Returns:
+            pandas.DataFrame: The dataframe, None if the table has no partitions.
+        """
+        query = self.latest_snapshot_query(table_name, columns, where)
+        if query is None:
+            logger.info(f"No partitions found in {table_name}")
+            return None
+        return self.get_dataframe(query)
+
     @retry(max_retries, retry_delay)
     def check_is_no_duplicate(self, tablename, dataframe):
         """
@@ -299,7 +696,10 @@ class BigQueryClient():
                 Select dwh_partitiondate FROM {}
                 WHERE dwh_partitiondate = DATETIME("{}")
                 LIMIT 1
-                """.format(tablename, formatted_datetime.strftime("%Y-%m-%d %H:%M:%S"))
+                """.format(tablename, formatted_datetime.strftime("%Y-%m-%d %H:%M:%S")),
+                # a bookkeeping query on one partition, neither cached nor guarded
+                use_cache=False,
+                guard=False
             )
             logger.debug("result")
             logger.debug(result)
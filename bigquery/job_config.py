@@ -1,13 +1,71 @@
 from google.cloud import bigquery
 from .schemes import (
-    crunchbase_schema
+    crunchbase_schema,
+    crunchbase_enrichment_schema,
+    analysis_schema,
+    validation_schema,
+    linkedin_schema
 )
 
 
 CRUNCHBASE_CONFIG = bigquery.LoadJobConfig(
     schema=crunchbase_schema.CRUNCHBASE_SCHEMA,
     autodetect=False,
-    source_format=bigquery.SourceFormat.CSV,
+    source_format=bigquery.SourceFormat.PARQUET,
+    schema_update_options=[
+        bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    write_disposition="WRITE_APPEND",
+)
+
+CRUNCHBASE_FOUNDERS_CONFIG = bigquery.LoadJobConfig(
+    schema=crunchbase_enrichment_schema.CRUNCHBASE_FOUNDERS_SCHEMA,
+    autodetect=False,
+    source_format=bigquery.SourceFormat.PARQUET,
+    schema_update_options=[
+        bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    write_disposition="WRITE_APPEND",
+)
+
+CRUNCHBASE_FUNDING_ROUNDS_CONFIG = bigquery.LoadJobConfig(
+    schema=crunchbase_enrichment_schema.CRUNCHBASE_FUNDING_ROUNDS_SCHEMA,
+    autodetect=False,
+    source_format=bigquery.SourceFormat.PARQUET,
+    schema_update_options=[
+        bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    write_disposition="WRITE_APPEND",
+)
+
+CRUNCHBASE_CATEGORIES_CONFIG = bigquery.LoadJobConfig(
+    schema=crunchbase_enrichment_schema.CRUNCHBASE_CATEGORIES_SCHEMA,
+    autodetect=False,
+    source_format=bigquery.SourceFormat.PARQUET,
+    schema_update_options=[
+        bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    write_disposition="WRITE_APPEND",
+)
+
+CATEGORIZED_CONFIG = bigquery.LoadJobConfig(
+    schema=analysis_schema.CATEGORIZED_SCHEMA,
+    autodetect=False,
+    source_format=bigquery.SourceFormat.PARQUET,
+    schema_update_options=[
+        bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    write_disposition="WRITE_APPEND",
+)
+
+VALIDATION_CONFIG = bigquery.LoadJobConfig(
+    schema=validation_schema.VALIDATION_SCHEMA,
+    autodetect=False,
+    source_format=bigquery.SourceFormat.PARQUET,
+    schema_update_options=[
+        bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
+    write_disposition="WRITE_APPEND",
+)
+
+LINKEDIN_CONFIG = bigquery.LoadJobConfig(
+    schema=linkedin_schema.LINKEDIN_SCHEMA,
+    autodetect=False,
+    source_format=bigquery.SourceFormat.PARQUET,
     schema_update_options=[
         bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION],
     write_disposition="WRITE_APPEND",
@@ -0,0 +1,124 @@
+import time
+from google.api_core.exceptions import GoogleAPIError
+
+from logger import Logger as logger
+
+
+def handle_job_error(name, job):
+    """
+    Log why a job failed.
+
+    Args:
+        name (str): The name of the job.
+        job (bigquery.job._AsyncJob): The failed job.
+    """
+    logger.error(f"Job {name} failed: {job.error_result}")
+    job_errors = getattr(job, 'errors', None)
+
+    if job_errors:
+        logger.error(f"Job errors: {job_errors}")
+
+
+class JobManager():
+    """ Tracks several BigQuery load and query jobs in flight """
+    poll_interval = 0.5
+    max_poll_interval = 10
+
+    def __init__(self, poll_interval=None, max_poll_interval=None):
+        """
+        Initializes the job manager.
+
+        Args:
+            poll_interval (float, optional): Seconds between the first polls, doubled while jobs run. Defaults to poll_interval.
+            max_poll_interval (float, optional): The upper bound of the poll interval. Defaults to max_poll_interval.
+        """
+        self.poll_interval = poll_interval or self.poll_interval
+        self.max_poll_interval = max_poll_interval or self.max_poll_interval
+        self.jobs = []
+
+    def submit(self, name, job):
+        """
+        Track a job that was started, e.g. by load_table_from_file or execute_query.
+
+        Args:
+            name (str): The name of the job in the summary, e.g. the table.
+            job (bigquery.job._AsyncJob): The job.
+        """
+        self.jobs.append({"name": name, "job": job, "submitted": time.time(), "finished": None})
+
+    def collect(self) -> int:
+        """
+        Check the jobs once without waiting, log the failed ones and forget the finished ones.
+
+        Returns:
+            int: The number of jobs that failed since the last call.
+        """
+        failed = 0
+        pending = []
+        for entry in self.jobs:
+            try:
+                done = entry["job"].done()
+            except GoogleAPIError as e:
+                logger.warning(f"Could not poll job {entry['name']}: {e}")
+                done = False
+            if not done:
+                pending.append(entry)
+            elif entry["job"].error_result:
+                handle_job_error(entry["name"], entry["job"])
+                failed += 1
+        self.jobs = pending
+        return failed
+
+    def wait(self, timeout=None) -> dict:
+        """
+        Poll all jobs until they are finished and log a summary.
+
+        Args:
+            timeout (float, optional): Seconds after which unfinished jobs are reported as failed. Defaults to None.
+
+        Returns:
+            dict: The summary with "jobs", "failed" and "seconds".
+        """
+        started = time.time()
+        interval = self.poll_interval
+        pending = [entry for entry in self.jobs if entry["finished"] is None]
+        while pending:
+            for entry in pending:
+                try:
+                    if entry["job"].done():
+                        entry["finished"] = time.time()
+                except GoogleAPIError as e:
+                    logger.warning(f"Could not poll job {entry['name']}: {e}")
+            pending = [entry for entry in pending if entry["finished"] is None]
+            if not pending:
+                break
+            if timeout is not None and time.time() - started > timeout:
+                logger.error(f"Timeout of {timeout} seconds reached, {len(pending)} jobs still running.")
+                break
+            time.sleep(interval)
+            interval = min(self.max_poll_interval, interval * 2)
+
+        summary = {"jobs": [], "failed": 0, "seconds": time.time() - started}
+        for entry in self.jobs:
+            job = entry["job"]
+            if entry["finished"] is None:
+                state = "RUNNING"
+            elif job.error_result:
+                state = "FAILED"
+                handle_job_error(entry["name"], job)
+            else:
+                state = "DONE"
+            rows = getattr(job, "output_rows", None)
+            if rows is None:
+                rows = getattr(job, "num_dml_affected_rows", None)
+            seconds = entry["finished"] - entry["submitted"] if entry["finished"] else None
+            summary["jobs"].append({"name": entry["name"], "job_id": job.job_id, "state": state, "rows": rows, "seconds": seconds})
+            if state != "DONE":
+                summary["failed"] += 1
+        self.jobs = [entry for entry in self.jobs if entry["finished"] is None]
+
+        for job in summary["jobs"]:
+            seconds = f"{job['seconds']:.1f}s" if job["seconds"] is not None else "-"
+            logger.debug(f"Job {job['name']} ({job['job_id']}): {job['state']}, {job['rows']} rows, {seconds}")
+        logger.info(f"{len(summary['jobs'])} BigQuery jobs finished in {summary['seconds']:.1f}s, {summary['failed']} failed")
+        return summary
@@ -0,0 +1,197 @@
+import os
+import re
+import uuid
+import threading
+import duckdb
+import pyarrow.parquet as pq
+from collections import namedtuple
+from google.cloud import bigquery
+
+from bigquery.client import BigQueryClient
+from bigquery.schemes.schema_helpers import FieldType
+from logger import Logger as logger
+
+# DuckDB types of the BigQuery field types
+DUCKDB_TYPES = {
+    FieldType.STRING.value: "VARCHAR",
+    FieldType.INT64.value: "BIGINT",
+    FieldType.FLOAT64.value: "DOUBLE",
+    FieldType.BOOL.value: "BOOLEAN",
+    FieldType.DATETIME.value: "TIMESTAMP",
+    FieldType.TIMESTAMP.value: "TIMESTAMPTZ",
+}
+
+
+def translate_query(query: str) -> str:
+    """
+    Translate the BigQuery SQL used in this project to DuckDB SQL.
+
+    Args:
+        query (str): The BigQuery query.
+
+    Returns:
+        str: The DuckDB query.
+    """
+    # BigQuery quotes identifiers with backticks, so double quotes always delimit strings
+    query = re.sub(r"`([^`]*)`", r"\1", query)
+    query = re.sub(r'"([^"]*)"', lambda match: "'{}'".format(match.group(1).replace("'", "''")), query)
+    return re.sub(r"DATETIME\('([^']*)'\)", r"CAST('\1' AS TIMESTAMP)", query)
+
+
+class LocalJob():
+    """ Finished job with the attributes of a BigQuery load or query job """
+
+    def __init__(self, rows=None, output_rows=None, num_dml_affected_rows=None):
+        self.job_id = f"local_{uuid.uuid4().hex[:12]}"
+        self.rows = rows or []
+        self.output_rows = output_rows
+        self.num_dml_affected_rows = num_dml_affected_rows
+        self.error_result = None
+        self.errors = None
+
+    def done(self) -> bool:
+        return True
+
+    def result(self) -> list:
+        return self.rows
+
+
+class LocalBigQueryClient(BigQueryClient):
+    """ BigQueryClient on an embedded DuckDB database, for offline load tests without GCP credentials """
+
+    def __init__(self, project_id, dataset_name, database="cache/bigquery_local.duckdb", load_chunk_mb=None, scan_guard=None):
+        """
+        Initialize the LocalBigQueryClient. Partitioning, clustering and expiration are ignored.
+
+        Args:
+            project_id (str): The project id, only used in table ids.
+            dataset_name (str): The dataset name, a schema in the database.
+            database (str, optional): The database file, ":memory:" keeps everything in memory. Defaults to "cache/bigquery_local.duckdb".
+            load_chunk_mb (int, optional): Upper bound of the data sent per load job. Defaults to load_chunk_mb.
+            scan_guard (str, optional): Accepted for compatibility, there is no scan cost locally. Defaults to None.
+        """
+        self.project_id = project_id or "local"
+        self.dataset_name = dataset_name or "local"
+        # DuckDB resolves schema.table, the project is only part of the returned table ids
+        self.dataset_refstring = self.dataset_name
+        self.dataset = None
+        self.expiration_time = 1000 * 60 * 60 * 24 * 30
+        self.load_chunk_bytes = (load_chunk_mb or self.load_chunk_mb) * 1024 * 1024
+        self.query_cache = None
+        self.scan_guard = "off"
+        if database != ":memory:":
+            os.makedirs(os.path.dirname(database) or ".", exist_ok=True)
+        self.connection = duckdb.connect(database)
+        self.lock = threading.Lock()
+        logger.success(f"Local BigQuery backend initialised ({database}).")
+
+    def _execute(self, query, parameters=None, translate=True):
+        with self.lock:
+            cursor = self.connection.cursor()
+            return cursor.execute(translate_query(query) if translate else query, parameters)
+
+    def _table_id(self, table_name) -> str:
+        # table names may already contain the dataset, e.g. in check_is_no_duplicate
+        if table_name.startswith(self.dataset_refstring + "."):
+            return table_name
+        return "{}.{}".format(self.dataset_refstring, table_name)
+
+    def dataset_exists(self) -> bool:
+        rows = self._execute(
+            "SELECT 1 FROM information_schema.schemata WHERE schema_name = ?", [self.dataset_name]
+        ).fetchall()
+        return len(rows) > 0
+
+    def create_dataset(self):
+        self._execute(f'CREATE SCHEMA IF NOT EXISTS "{self.dataset_name}"', translate=False)
+
+    def get_dataset(self) -> bigquery.Dataset:
+        return bigquery.Dataset("{}.{}".format(self.project_id, self.dataset_name))
+
+    def delete_dataset(self):
+        self._execute(f'DROP SCHEMA IF EXISTS "{self.dataset_name}" CASCADE', translate=False)
+
+    def table_exists(self, table_name) -> bool:
+        table = self._table_id(table_name).split(".")[-1]
+        rows = self._execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_schema = ? AND table_name = ?",
+            [self.dataset_name, table]
+        ).fetchall()
+        return len(rows) > 0
+
+    def create_table(self, table_name, schema, expire_partitions=True, clustering_fields=None,
+                     require_partition_filter=True) -> bigquery.Table:
+        self.create_dataset()
+        columns = ", ".join('"{}" {}'.format(field.name, DUCKDB_TYPES[field.field_type]) for field in schema)
+        self._execute(f"CREATE TABLE IF NOT EXISTS {self._table_id(table_name)} ({columns})", translate=False)
+        return self.get_table(table_name)
+
+    def get_table(self, table_name) -> bigquery.Table:
+        if not self.table_exists(table_name):
+            return None
+        table = self._table_id(table_name).split(".")[-1]
+        rows = self._execute(f"SELECT COUNT(*) FROM {self._table_id(table_name)}").fetchall()
+        bq_table = bigquery.Table("{}.{}.{}".format(self.project_id, self.dataset_name, table))
+        bq_table._properties["numRows"] = str(rows[0][0])
+        return bq_table
+
+    def create_staging_table(self, table_name, schema) -> bigquery.Table:
+        return self.create_table("{}_staging_{}".format(table_name, uuid.uuid4().hex[:8]), schema)
+
+    def _insert(self, data, table_name, job_config) -> LocalJob:
+        table_id = self._table_id(table_name)
+        if not self.table_exists(table_name):
+            self.create_table(table_name, job_config.schema)
+        # like ALLOW_FIELD_ADDITION, columns missing in the table are added
+        existing = {row[0] for row in self._execute(f"DESCRIBE {table_id}").fetchall()}
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.register("load_data", data)
+            for column, dtype, *_ in cursor.execute("DESCRIBE load_data").fetchall():
+                if column not in existing:
+                    cursor.execute(f'ALTER TABLE {table_id} ADD COLUMN "{column}" {dtype}')
+            cursor.execute(f"INSERT INTO {table_id} BY NAME SELECT * FROM load_data")
+            cursor.unregister("load_data")
+        return LocalJob(output_rows=len(data))
+
+    def load_table_from_dataframe(self, dataframe, table_name, job_config) -> LocalJob:
+        return self._insert(dataframe, table_name, job_config)
+
+    def load_table_from_file(self, file_obj, table_name, job_config) -> LocalJob:
+        file_obj.seek(0)
+        return self._insert(pq.read_table(file_obj), table_name, job_config)
+
+    def row_hash(self, alias, columns) -> str:
+        return "hash(row({}))".format(", ".join("{}.{}".format(alias, column) for column in columns))
+
+    def delete_table(self, table_name):
+        self._execute(f"DROP TABLE IF EXISTS {self._table_id(table_name)}")
+
+    def create_view(self, query, view_name):
+        self.create_dataset()
+        self._execute(f"CREATE VIEW {self._table_id(view_name)} AS {query}")
+
+    def update_view(self, query, view_name):
+        self.create_dataset()
+        self._execute(f"CREATE OR REPLACE VIEW {self._table_id(view_name)} AS {query}")
+
+    def execute_query(self, query) -> LocalJob:
+        cursor = self._execute(query)
+        if cursor.description is None:
+            return LocalJob()
+        Row = namedtuple("Row", [column[0] for column in cursor.description], rename=True)
+        rows = [Row(*row) for row in cursor.fetchall()]
+        # DML statements return their affected rows as "Count"
+        affected = rows[0][0] if len(rows) == 1 and cursor.description[0][0] == "Count" else None
+        return LocalJob(rows=rows, num_dml_affected_rows=affected)
+
+    def get_dataframe(self, query, use_cache=True, guard=True):
+        logger.debug("Query")
+        logger.debug(query)
+        return self._execute(query).fetch_arrow_table().to_pandas()
+
+    def latest_partition(self, table_name):
+        rows = self._execute(
+            f"SELECT date_trunc('hour', MAX(dwh_partitiondate)) FROM {self._table_id(table_name)}"
+        ).fetchall()
+        return rows[0][0] if rows else None
@@ -0,0 +1,96 @@
+import os
+import re
+import json
+import hashlib
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from helpers.atomic import atomic_write
+
+from logger import Logger as logger
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query so that formatting does not change its cache key.
+
+    Args:
+        query (str): The query.
+
+    Returns:
+        str: The query with collapsed whitespace.
+    """
+    return re.sub(r"\s+", " ", query).strip().rstrip(";")
+
+
+class QueryCache():
+    """ On-disk cache of query results, stored as Parquet """
+
+    def __init__(self, directory: str):
+        """
+        Initializes the query cache.
+
+        Args:
+            directory (str): The folder holding the cached results.
+        """
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, query: str, table_versions: list) -> str:
+        """
+        Build the cache key of a query.
+
+        Args:
+            query (str): The query.
+            table_versions (list): (table id, modification time) of every referenced table.
+
+        Returns:
+            str: The key.
+        """
+        content = json.dumps([normalize_query(query), sorted(table_versions)])
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def get(self, key: str) -> pa.Table:
+        """
+        Get a cached result.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            pa.Table: The result, None if it is not cached.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bytes_read += os.path.getsize(path)
+        return pq.read_table(path)
+
+    def put(self, key: str, table: pa.Table):
+        """
+        Store a result.
+
+        Args:
+            key (str): The cache key.
+            table (pa.Table): The result.
+        """
+        path = self._path(key)
+        with atomic_write(path) as tmp_path:
+            pq.write_table(table, tmp_path, compression="zstd")
+
+    def log_stats(self):
+        """ Log the hit and miss counts """
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        logger.info(
+            f"BigQuery result cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate), "
+            f"{self.bytes_read / 1024 / 1024:.1f} MB read from {self.directory}"
+        )
@@ -0,0 +1,13 @@
+from . import schema_helpers as sh
+
+CATEGORIZED_SCHEMA = [
+sh.DateTimeField("dwh_partitiondate"),
+sh.StringField('Company_Name'),
+sh.StringField('Short_Description'),
+sh.StringField('RE_Strategy_Codes'),
+sh.StringField('RE_Strategy_Names'),
+sh.IntField('RE_Strategy_Mask'),
+sh.StringField('City'),
+sh.StringField('Region'),
+sh.StringField('Country')
+]
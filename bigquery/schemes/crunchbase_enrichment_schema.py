@@ -0,0 +1,30 @@
+from . import schema_helpers as sh
+
+# cards of the organizations, joined to CRUNCHBASE_SCHEMA by UUID
+CRUNCHBASE_FOUNDERS_SCHEMA = [
+sh.DateTimeField("dwh_partitiondate"),
+sh.StringField('UUID'),
+sh.StringField('Founder_UUID'),
+sh.StringField('Founder_Name'),
+sh.StringField('Founder_Permalink')
+]
+
+CRUNCHBASE_FUNDING_ROUNDS_SCHEMA = [
+sh.DateTimeField("dwh_partitiondate"),
+sh.StringField('UUID'),
+sh.StringField('Funding_Round_UUID'),
+sh.StringField('Funding_Round_Name'),
+sh.StringField('Announced_On'),
+sh.StringField('Investment_Type'),
+sh.IntField('Money_Raised_USD')
+]
+
+CRUNCHBASE_CATEGORIES_SCHEMA = [
+sh.DateTimeField("dwh_partitiondate"),
+sh.StringField('UUID'),
+sh.StringField('Category_UUID'),
+sh.StringField('Category_Name'),
+sh.StringField('Category_Permalink')
+]
+
+ENRICHMENT_CLUSTERING = ["UUID"]
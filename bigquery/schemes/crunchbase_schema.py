@@ -18,9 +18,13 @@ sh.StringField('Twitter_Link'),
 sh.StringField('Updated_Date'),
 sh.StringField('UUID'),
 sh.StringField('Website_URL'),
+sh.IntField('Rank_Org'),
 sh.StringField('City'),
 sh.StringField('Region'),
 sh.StringField('Country'),
 sh.StringField('Continent')
 
 ]
+
+# our queries filter by location and UUID
+CRUNCHBASE_CLUSTERING = ["Country", "City", "UUID"]
@@ -0,0 +1,8 @@
+from . import schema_helpers as sh
+
+LINKEDIN_SCHEMA = [
+sh.DateTimeField("dwh_partitiondate"),
+sh.StringField('UUID'),
+sh.StringField('Name'),
+sh.StringField('linkedin_data')
+]
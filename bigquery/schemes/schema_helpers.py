@@ -1,4 +1,5 @@
 from enum import Enum
+import pyarrow as pa
 from google.cloud.bigquery import SchemaField
 
 
@@ -45,3 +46,30 @@ class TimestampField(SchemaField):
     def __init__(self, name, mode=FieldMode.NULLABLE):
         super().__init__(name, FieldType.TIMESTAMP.value, mode=mode.value)
 
+
+
+# Arrow types of the BigQuery field types, DATETIME is a timestamp without time zone
+ARROW_TYPES = {
+    FieldType.STRING.value: pa.string(),
+    FieldType.INT64.value: pa.int64(),
+    FieldType.FLOAT64.value: pa.float64(),
+    FieldType.BOOL.value: pa.bool_(),
+    FieldType.DATETIME.value: pa.timestamp('us'),
+    FieldType.TIMESTAMP.value: pa.timestamp('us', tz='UTC'),
+}
+
+
+def to_arrow_schema(schema) -> pa.Schema:
+    """
+    Convert a BigQuery schema to an Arrow schema.
+
+    Args:
+        schema (list): The BigQuery schema.
+
+    Returns:
+        pa.Schema: The Arrow schema.
+    """
+    return pa.schema([
+        pa.field(field.name, ARROW_TYPES[field.field_type], nullable=field.mode != FieldMode.REQUIRED.value)
+        for field in schema
+    ])
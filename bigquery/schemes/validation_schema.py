@@ -0,0 +1,9 @@
+from . import schema_helpers as sh
+from .analysis_schema import CATEGORIZED_SCHEMA
+
+# the categorized companies with the answers of OpenAI
+VALIDATION_SCHEMA = CATEGORIZED_SCHEMA + [
+sh.StringField('openai_agreement'),
+sh.StringField('openai_strategy'),
+sh.StringField('openai_explanation')
+]
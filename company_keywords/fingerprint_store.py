@@ -0,0 +1,156 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from helpers.atomic import finish_write, temporary_path
+from helpers.cache import get_cache_path
+from logger import Logger as logger
+
+STORE_SCHEMA = pa.schema([
+    ("UUID", pa.string()),
+    ("Fingerprint", pa.uint64()),
+    ("RE_Strategy_Mask", pa.int64()),
+])
+
+
+def keyword_version(strategies: dict) -> str:
+    """
+    Get the version of a keyword set, it changes with any name, synonym or definition.
+
+    Args:
+        strategies (dict): The strategies by code.
+
+    Returns:
+        str: 16 hex characters.
+    """
+    content = json.dumps(strategies, sort_keys=True)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint(descriptions: pd.Series, version: str) -> np.ndarray:
+    """
+    Hash descriptions together with a keyword version.
+
+    Args:
+        descriptions (pd.Series): The short descriptions.
+        version (str): The keyword version, used as hash key.
+
+    Returns:
+        np.ndarray: One uint64 per description.
+    """
+    return pd.util.hash_pandas_object(descriptions.fillna(""), index=False, hash_key=version).to_numpy()
+
+
+class FingerprintStore():
+    """ Categorization results by UUID, reused while description and keywords stay the same """
+
+    def __init__(self, path: str = None):
+        """
+        Initializes the store.
+
+        Args:
+            path (str, optional): The Parquet file. Defaults to cache/categorization_fingerprints.parquet.
+        """
+        self.path = path or get_cache_path("categorization_fingerprints.parquet")
+
+    def load(self) -> pd.DataFrame:
+        """
+        Load the stored UUID, Fingerprint and RE_Strategy_Mask columns.
+
+        Returns:
+            pd.DataFrame: The stored results, empty if there are none.
+        """
+        if not os.path.exists(self.path):
+            return STORE_SCHEMA.empty_table().to_pandas()
+        return pq.read_table(self.path).to_pandas()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(discard=exc_type is not None)
+
+    def open(self):
+        """ Load the stored results and start a new store, filled by match and swapped in on close """
+        stored = self.load().drop_duplicates("UUID", keep="last")
+        self.stored_index = pd.Index(stored["UUID"])
+        self.stored_fingerprints = stored["Fingerprint"].to_numpy()
+        self.stored_masks = stored["RE_Strategy_Mask"].to_numpy()
+        self.writer = None
+        self.counts = {"reused": 0, "changed": 0, "new": 0}
+
+    def close(self, discard: bool = False):
+        """
+        Replace the stored results by the ones matched since open, companies that are gone are dropped.
+
+        Args:
+            discard (bool, optional): Keep the previous results. Defaults to False.
+        """
+        logger.info(f"{self.counts['reused']} categorizations reused, {self.counts['changed']} changed, "
+                    f"{self.counts['new']} new")
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        finish_write(self.path, discard)
+
+    def match(self, uuids: pd.Series, descriptions: pd.Series, matcher, workers: int = 1, chunk_rows: int = 20000) -> np.ndarray:
+        """
+        Get the strategy bits of companies, matching only new or changed descriptions.
+
+        Can be called once per chunk between open and close.
+
+        Args:
+            uuids (pd.Series): The UUIDs.
+            descriptions (pd.Series): The short descriptions.
+            matcher (StrategyMatcher): The compiled strategies.
+            workers (int, optional): The number of processes matching the descriptions. Defaults to 1.
+            chunk_rows (int, optional): The descriptions per chunk sent to a process. Defaults to 20000.
+
+        Returns:
+            np.ndarray: The strategy bits in the order of the companies.
+        """
+        fingerprints = fingerprint(descriptions, keyword_version(matcher.strategies))
+        positions = self.stored_index.get_indexer(uuids)
+        found = positions >= 0
+        hit = found.copy()
+        hit[found] = self.stored_fingerprints[positions[found]] == fingerprints[found]
+
+        masks = np.zeros(len(uuids), dtype=np.int64)
+        masks[hit] = self.stored_masks[positions[hit]]
+        missing = np.flatnonzero(~hit)
+        if len(missing):
+            masks[missing] = matcher.masks(descriptions.iloc[missing], workers, chunk_rows)
+        self.counts["reused"] += int(hit.sum())
+        self.counts["changed"] += int((found & ~hit).sum())
+        self.counts["new"] += int((~found).sum())
+
+        stored = pd.DataFrame({"UUID": uuids.to_numpy(), "Fingerprint": fingerprints, "RE_Strategy_Mask": masks})
+        # companies seen twice keep their last result, load drops the earlier ones
+        table = pa.Table.from_pandas(stored[stored["UUID"].notna()], schema=STORE_SCHEMA, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(temporary_path(self.path), STORE_SCHEMA)
+        self.writer.write_table(table)
+        return masks
+
+    def masks(self, uuids: pd.Series, descriptions: pd.Series, matcher, workers: int = 1, chunk_rows: int = 20000) -> np.ndarray:
+        """
+        Get the strategy bits of all companies and replace the stored results with them.
+
+        Args:
+            uuids (pd.Series): The UUIDs.
+            descriptions (pd.Series): The short descriptions.
+            matcher (StrategyMatcher): The compiled strategies.
+            workers (int, optional): The number of processes matching the descriptions. Defaults to 1.
+            chunk_rows (int, optional): The descriptions per chunk sent to a process. Defaults to 20000.
+
+        Returns:
+            np.ndarray: The strategy bits in the order of the companies.
+        """
+        with self:
+            return self.match(uuids, descriptions, matcher, workers, chunk_rows)
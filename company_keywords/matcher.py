@@ -0,0 +1,267 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from company_keywords.keywords import Keywords
+
+
+def strategy_mask(codes, strategies: dict = None) -> int:
+    """
+    Get the mask of strategy codes, one bit per strategy in the order of the strategies.
+
+    Args:
+        codes (Iterable): The codes, e.g. ["R3", "R8"].
+        strategies (dict, optional): The strategies by code. Defaults to Keywords.re_strategies.
+
+    Returns:
+        int: The strategy bits.
+    """
+    bits = {code: bit for bit, code in enumerate(strategies or Keywords.re_strategies)}
+    mask = 0
+    for code in codes:
+        mask |= 1 << bits[code]
+    return mask
+
+
+def strategy_codes(mask: int, strategies: dict = None) -> list:
+    """
+    Get the codes of the strategies in a mask.
+
+    Args:
+        mask (int): The strategy bits.
+        strategies (dict, optional): The strategies by code. Defaults to Keywords.re_strategies.
+
+    Returns:
+        list: The codes in the order of the strategies.
+    """
+    return [code for bit, code in enumerate(strategies or Keywords.re_strategies) if int(mask) >> bit & 1]
+
+
+def strategy_matrix(masks: pd.Series, strategies: dict = None) -> pd.DataFrame:
+    """
+    Expand masks into one boolean column per strategy code.
+
+    Args:
+        masks (pd.Series): The strategy bits.
+        strategies (dict, optional): The strategies by code. Defaults to Keywords.re_strategies.
+
+    Returns:
+        pd.DataFrame: The matrix with the index of the masks.
+    """
+    codes = list(strategies or Keywords.re_strategies)
+    values = masks.fillna(0).to_numpy(dtype=np.int64)
+    matrix = (values[:, None] >> np.arange(len(codes))) & 1
+    return pd.DataFrame(matrix.astype(bool), index=masks.index, columns=codes)
+
+
+def has_strategy(masks: pd.Series, *codes, strategies: dict = None) -> pd.Series:
+    """
+    Filter by strategy, e.g. df[has_strategy(df['RE_Strategy_Mask'], "R3", "R8")].
+
+    Args:
+        masks (pd.Series): The strategy bits.
+        *codes (str): The codes, a row matches if it has any of them.
+        strategies (dict, optional): The strategies by code. Defaults to Keywords.re_strategies.
+
+    Returns:
+        pd.Series: True for the rows with one of the strategies.
+    """
+    return (masks.fillna(0).astype(np.int64) & strategy_mask(codes, strategies)) != 0
+
+
+def explode_strategies(df: pd.DataFrame, mask_column: str = 'RE_Strategy_Mask', strategies: dict = None) -> pd.DataFrame:
+    """
+    Repeat every row once per strategy in its mask.
+
+    Args:
+        df (pd.DataFrame): The rows.
+        mask_column (str, optional): The column of the strategy bits. Defaults to 'RE_Strategy_Mask'.
+        strategies (dict, optional): The strategies by code. Defaults to Keywords.re_strategies.
+
+    Returns:
+        pd.DataFrame: The rows with the RE_Strategy_Code and RE_Strategy_Name of one strategy each,
+        in the order of the rows and then of the strategies. Rows without a strategy are dropped.
+    """
+    strategies = strategies or Keywords.re_strategies
+    rows, bits = np.nonzero(strategy_matrix(df[mask_column], strategies).to_numpy())
+    codes = np.array(list(strategies), dtype=object)
+    names = np.array([strategy["name"] for strategy in strategies.values()], dtype=object)
+    return df.iloc[rows].assign(RE_Strategy_Code=codes[bits], RE_Strategy_Name=names[bits])
+
+
+def count_by_strategy(masks: pd.Series, strategies: dict = None) -> pd.Series:
+    """
+    Count the rows of every strategy, a row with several strategies counts for each.
+
+    Args:
+        masks (pd.Series): The strategy bits.
+        strategies (dict, optional): The strategies by code. Defaults to Keywords.re_strategies.
+
+    Returns:
+        pd.Series: The counts by strategy code.
+    """
+    return strategy_matrix(masks, strategies).sum()
+
+
+def trie_pattern(terms: list) -> str:
+    """
+    Build a regular expression matching the longest of the terms at a position.
+
+    The terms are merged into a prefix tree, so the pattern tests each character
+    once per position instead of once per term.
+
+    Args:
+        terms (list): The lowercase terms.
+
+    Returns:
+        str: The pattern.
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # a term ending here is only taken if no longer term matches
+        if "" in node:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return build(trie)
+
+
+# the matcher of a worker process, compiled once by init_worker
+worker_matcher = None
+
+
+def init_worker(strategies: dict):
+    global worker_matcher
+    worker_matcher = StrategyMatcher(strategies)
+
+
+def match_chunk(texts: list) -> list:
+    return worker_matcher.masks(texts)
+
+
+class StrategyMatcher():
+    """ Finds all RE strategies whose name or synonyms occur in a text, in one pass """
+
+    def __init__(self, strategies: dict = None):
+        """
+        Compile the terms of all strategies into one pattern.
+
+        Args:
+            strategies (dict, optional): The strategies by code, each with a "name" and
+                optional "synonyms". Defaults to Keywords.re_strategies.
+        """
+        self.strategies = strategies or Keywords.re_strategies
+        self.codes = list(self.strategies)
+        self.names = [strategy["name"] for strategy in self.strategies.values()]
+        # every strategy is one bit, in the order of the strategies
+        term_masks = {}
+        for bit, strategy in enumerate(self.strategies.values()):
+            for term in [strategy["name"]] + list(strategy.get("synonyms", [])):
+                term = term.lower()
+                term_masks[term] = term_masks.get(term, 0) | 1 << bit
+        # terms matching at the same position are prefixes of the longest one
+        self.term_masks = {}
+        for term in term_masks:
+            mask = 0
+            for end in range(1, len(term) + 1):
+                mask |= term_masks.get(term[:end], 0)
+            self.term_masks[term] = mask
+        # the lookahead finds the longest term at every position, also inside other matches
+        self.pattern = re.compile("(?=(" + trie_pattern(list(term_masks)) + "))")
+        self.executor = None
+
+    def start_workers(self, workers: int):
+        """
+        Keep a process pool for the following calls of masks until close, instead of one pool per call.
+
+        Args:
+            workers (int): The number of processes, no pool is started for one.
+        """
+        if workers > 1 and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                                initargs=(self.strategies,))
+
+    def close(self):
+        """ Stop the process pool """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def mask(self, text: str) -> int:
+        """
+        Get the strategies occurring in a text.
+
+        Args:
+            text (str): The text, e.g. a short description.
+
+        Returns:
+            int: The strategy bits.
+        """
+        if not isinstance(text, str):
+            return 0
+        mask = 0
+        for term in set(self.pattern.findall(text.lower())):
+            mask |= self.term_masks[term]
+        return mask
+
+    def masks(self, texts, workers: int = 1, chunk_rows: int = 20000) -> list:
+        """
+        Get the strategies occurring in many texts, matching each distinct text once.
+
+        With several workers, or a pool kept by start_workers, the texts are split into
+        chunks that are matched in a process pool. Every worker compiles its own matcher
+        once, and the chunks are reassembled in order.
+
+        Args:
+            texts (Iterable): The texts.
+            workers (int, optional): The number of processes. Defaults to 1.
+            chunk_rows (int, optional): The texts per chunk sent to a process. Defaults to 20000.
+
+        Returns:
+            list: The strategy bits per text.
+        """
+        if workers > 1 or self.executor is not None:
+            texts = list(texts)
+            if len(texts) > chunk_rows:
+                chunks = [texts[start:start + chunk_rows] for start in range(0, len(texts), chunk_rows)]
+                started = self.executor is None
+                self.start_workers(workers)
+                masks = []
+                try:
+                    for chunk_masks in self.executor.map(match_chunk, chunks):
+                        masks.extend(chunk_masks)
+                finally:
+                    if started:
+                        self.close()
+                return masks
+        cache = {}
+        masks = []
+        for text in texts:
+            if text not in cache:
+                cache[text] = self.mask(text)
+            masks.append(cache[text])
+        return masks
+
+    def decode(self, mask: int) -> tuple:
+        """
+        Get the codes and names of the strategies in a mask.
+
+        Args:
+            mask (int): The strategy bits.
+
+        Returns:
+            tuple: The list of codes and the list of names.
+        """
+        bits = [bit for bit in range(len(self.codes)) if mask >> bit & 1]
+        return [self.codes[bit] for bit in bits], [self.names[bit] for bit in bits]
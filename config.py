@@ -21,6 +21,21 @@ class Config:
     CRUNCHBASE_BASE_URL = None
     CRUNCHBASE_API_KEY = None
     OPENAI_API_KEY = None
+    CRUNCHBASE_MAX_CONCURRENCY = 4
+    CRUNCHBASE_REQUESTS_PER_MINUTE = 200
+    OPENAI_REQUESTS_PER_MINUTE = 60
+    CRAWL_WORKERS = 1
+    CRAWL_LOCATION_UUIDS = None
+    ENRICHMENT_WORKERS = 4
+    ANALYSIS_WORKERS = 1
+    CRUNCHBASE_CHECKPOINT_DIR = "cache/checkpoints"
+    CRUNCHBASE_CHECKPOINT_MAX_AGE_HOURS = 24
+
+    # http transport config
+    HTTP_CONNECT_TIMEOUT = 5.0
+    HTTP_READ_TIMEOUT = 60.0
+    HTTP_POOL_CONNECTIONS = 10
+    HTTP_POOL_MAXSIZE = 10
 
     # for future implementations
     LINKEDIN_ACCOUNT = None
@@ -31,8 +46,24 @@ class Config:
     DO_LINKEDIN = False
     DO_OPENAI = False
     DO_DOWNLOAD = False
+    DO_DELTA = False
+    DO_PIPELINE = False
+    DO_UPSERT = False
+    DO_ENRICHMENT = False
+    PIPELINE_CHUNK_ROWS = 50000
+    ANALYSIS_CHUNK_ROWS = 20000
+    ANALYSIS_STREAM = False
+    ANALYSIS_STREAM_ROWS = 100000
+    BIGQUERY_LOAD_CHUNK_MB = 64
+    UPLOAD_BATCH_ROWS = 10000
+    UPLOAD_FLUSH_SECONDS = 600
+    BIGQUERY_CACHE_DIR = None
+    BIGQUERY_SCAN_GUARD = "off"
+    BIGQUERY_BACKEND = "bigquery"
+    BIGQUERY_LOCAL_DATABASE = "cache/bigquery_local.duckdb"
     DO_ANALYSIS = False
     DO_MAPPING = False
+    CSV_EXPORT = False
 
     # client config
     LINKEDIN_NEEDED = False
@@ -63,11 +94,20 @@ class Config:
         """ Parse arguments """
         parser = argparse.ArgumentParser(description='Program for downloading data from Crunchbase.')
         parser.add_argument('--download_flag', action='store_true', help='Flag to enable crunchbase data processing.')
+        parser.add_argument('--delta_flag', action='store_true', help='Flag to only fetch organizations updated since the last download.')
+        parser.add_argument('--pipeline_flag', action='store_true', help='Flag to upload to BigQuery in chunks while the download is still running.')
+        parser.add_argument('--upsert_flag', action='store_true', help='Flag to merge companies into one row per UUID instead of appending every run.')
+        parser.add_argument('--enrichment_flag', action='store_true', help='Flag to fetch founders, funding rounds and categories of the downloaded companies.')
         parser.add_argument('--analysis_flag', action='store_true', help='Flag to enable analysis from csv')
         parser.add_argument('--mapping_flag', action='store_true', help='Flag to enable map analyzed companies from csv')
         parser.add_argument('--upload_flag', action='store_true', help='Flag to enable upload data to bigquery processing.')
         parser.add_argument('--linkedin_flag', action='store_true', help='Flag to enable linkedin data processing.')
         parser.add_argument('--validation_flag', action='store_true', help='Flag to enable validation of categorisation with AI.')
+        parser.add_argument('--crawl_workers', type=int, default=1, help='Number of created_at or location partitions fetched in parallel from Crunchbase')
+        parser.add_argument('--enrichment_workers', type=int, default=4, help='Number of organization cards fetched in parallel from Crunchbase')
+        parser.add_argument('--analysis_workers', type=int, default=1, help='Number of processes categorizing the companies in the analysis')
+        parser.add_argument('--analysis_stream', action='store_true', help='Flag to categorize the companies chunk by chunk with bounded memory')
+        parser.add_argument('--csv_export', action='store_true', help='Flag to also write every reporting artifact as csv')
         parser.add_argument('--project_id', help='BigQuery project ID to ignore the environment variable')
         parser.add_argument('--dataset_id', help='BigQuery dataset ID to ignore the environment variable')
         parser.add_argument('--linkedin_account', help='Linkedin account for accessing the API')
@@ -108,12 +148,39 @@ class Config:
         if args.download_flag:
             Config.DO_DOWNLOAD = args.download_flag
 
+        if args.delta_flag:
+            Config.DO_DELTA = args.delta_flag
+
+        if args.pipeline_flag:
+            Config.DO_PIPELINE = args.pipeline_flag
+
+        if args.upsert_flag:
+            Config.DO_UPSERT = args.upsert_flag
+
         if args.linkedin_flag:
             Config.DO_LINKEDIN = args.linkedin_flag
         
         if args.validation_flag:
             Config.DO_OPENAI = args.validation_flag
 
+        if args.csv_export:
+            Config.CSV_EXPORT = args.csv_export
+
+        if args.crawl_workers:
+            Config.CRAWL_WORKERS = args.crawl_workers
+
+        if args.enrichment_flag:
+            Config.DO_ENRICHMENT = args.enrichment_flag
+
+        if args.enrichment_workers:
+            Config.ENRICHMENT_WORKERS = args.enrichment_workers
+
+        if args.analysis_workers:
+            Config.ANALYSIS_WORKERS = args.analysis_workers
+
+        if args.analysis_stream:
+            Config.ANALYSIS_STREAM = args.analysis_stream
+
         if args.project_id:
             Config.PROJECT_ID = args.project_id
         else:
@@ -122,6 +189,15 @@ class Config:
             Config.DATASET_ID = args.dataset_id
         else:
             Config.DATASET_ID = os.getenv("GOOGLE_DATASET_ID")
+        Config.BIGQUERY_LOAD_CHUNK_MB = int(os.getenv("BIGQUERY_LOAD_CHUNK_MB", Config.BIGQUERY_LOAD_CHUNK_MB))
+        Config.UPLOAD_BATCH_ROWS = int(os.getenv("UPLOAD_BATCH_ROWS", Config.UPLOAD_BATCH_ROWS))
+        Config.ANALYSIS_CHUNK_ROWS = int(os.getenv("ANALYSIS_CHUNK_ROWS", Config.ANALYSIS_CHUNK_ROWS))
+        Config.ANALYSIS_STREAM_ROWS = int(os.getenv("ANALYSIS_STREAM_ROWS", Config.ANALYSIS_STREAM_ROWS))
+        Config.UPLOAD_FLUSH_SECONDS = float(os.getenv("UPLOAD_FLUSH_SECONDS", Config.UPLOAD_FLUSH_SECONDS))
+        Config.BIGQUERY_CACHE_DIR = os.getenv("BIGQUERY_CACHE_DIR", Config.BIGQUERY_CACHE_DIR)
+        Config.BIGQUERY_SCAN_GUARD = os.getenv("BIGQUERY_SCAN_GUARD", Config.BIGQUERY_SCAN_GUARD)
+        Config.BIGQUERY_BACKEND = os.getenv("BIGQUERY_BACKEND", Config.BIGQUERY_BACKEND)
+        Config.BIGQUERY_LOCAL_DATABASE = os.getenv("BIGQUERY_LOCAL_DATABASE", Config.BIGQUERY_LOCAL_DATABASE)
         if args.linkedin_account:
             Config.LINKEDIN_ACCOUNT = args.linkedin_account
         else:
@@ -146,6 +222,20 @@ class Config:
         # set Crunchbase Config
         Config.CRUNCHBASE_BASE_API = os.getenv("CRUNCHBASE_BASE_API")
         Config.CRUNCHBASE_BASE_URL = os.getenv("CRUNCHBASE_BASE_URL") 
+        Config.PIPELINE_CHUNK_ROWS = int(os.getenv("PIPELINE_CHUNK_ROWS", Config.PIPELINE_CHUNK_ROWS))
+        Config.CRUNCHBASE_CHECKPOINT_DIR = os.getenv("CRUNCHBASE_CHECKPOINT_DIR", Config.CRUNCHBASE_CHECKPOINT_DIR)
+        Config.CRUNCHBASE_CHECKPOINT_MAX_AGE_HOURS = float(os.getenv("CRUNCHBASE_CHECKPOINT_MAX_AGE_HOURS", Config.CRUNCHBASE_CHECKPOINT_MAX_AGE_HOURS))
+        if os.getenv("CRAWL_LOCATION_UUIDS"):
+            Config.CRAWL_LOCATION_UUIDS = [uuid.strip() for uuid in os.getenv("CRAWL_LOCATION_UUIDS").split(",") if uuid.strip()]
+        Config.CRUNCHBASE_MAX_CONCURRENCY = int(os.getenv("CRUNCHBASE_MAX_CONCURRENCY", Config.CRUNCHBASE_MAX_CONCURRENCY))
+        Config.CRUNCHBASE_REQUESTS_PER_MINUTE = int(os.getenv("CRUNCHBASE_REQUESTS_PER_MINUTE", Config.CRUNCHBASE_REQUESTS_PER_MINUTE))
+        Config.OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", Config.OPENAI_REQUESTS_PER_MINUTE))
+
+        # set HTTP transport Config
+        Config.HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", Config.HTTP_CONNECT_TIMEOUT))
+        Config.HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", Config.HTTP_READ_TIMEOUT))
+        Config.HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", Config.HTTP_POOL_CONNECTIONS))
+        Config.HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", Config.HTTP_POOL_MAXSIZE))
 
     def set_development_settings(self):
         """
@@ -183,7 +273,8 @@ class Config:
 
         # Crunchbase is needed if this tasks are enabled
         Config.CRUNBASE_NEEDED = any([
-            Config.DO_DOWNLOAD
+            Config.DO_DOWNLOAD,
+            Config.DO_ENRICHMENT
         ])
         # Download from Crunchbase is needed if Linkedin processing tasks are enabled
         Config.LINKEDIN_NEEDED = any([
@@ -0,0 +1,118 @@
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime, timedelta
+
+from helpers.atomic import atomic_write
+from logger import Logger as logger
+
+
+def query_key(query: dict) -> str:
+    """
+    Build a stable key for a query, e.g. to store its watermark or checkpoint.
+
+    Args:
+        query (dict): The query.
+
+    Returns:
+        str: The key.
+    """
+    return hashlib.sha1(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class CrawlCheckpoint():
+    """ Local checkpoint of a paginated Crunchbase crawl """
+    # older crawls are started anew, their pages are outdated and the partition of a pipelined run may have expired
+    max_age_hours = 24
+
+    def __init__(self, query: dict, directory: str, max_age_hours: float = None):
+        """
+        Initializes the checkpoint of a query and loads its state if one exists.
+
+        A stored state is discarded with a warning if it is older than max_age_hours
+        or belongs to another query.
+
+        Args:
+            query (dict): The query that is crawled.
+            directory (str): The folder holding all checkpoints.
+            max_age_hours (float, optional): The age up to which a crawl is resumed. Defaults to max_age_hours.
+        """
+        self.key = query_key(query)
+        self.path = os.path.join(directory, self.key)
+        self.state_file = os.path.join(self.path, "state.json")
+        self.max_age_hours = max_age_hours or self.max_age_hours
+        self.state = self.new_state()
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            reason = self.stale_reason(state)
+            if reason:
+                logger.warning(f"Discarding checkpoint {self.path}, {reason}")
+                self.clear()
+            else:
+                self.state = state
+                logger.info(f"Resuming crawl from checkpoint {self.path} ({self.state['rows']} rows, after_id={self.state['after_id']})")
+
+    def new_state(self) -> dict:
+        return {"after_id": None, "pages": 0, "rows": 0, "done": False,
+                "query": self.key, "created_at": datetime.now().isoformat()}
+
+    def stale_reason(self, state: dict) -> str:
+        """
+        Check if a stored state must not be resumed.
+
+        Args:
+            state (dict): The stored state.
+
+        Returns:
+            str: Why the state is stale, None if it can be resumed.
+        """
+        if state.get("query") != self.key:
+            return "it was written for another query"
+        created_at = state.get("created_at")
+        if not created_at:
+            return "its age is unknown"
+        age = datetime.now() - datetime.fromisoformat(created_at)
+        if age > timedelta(hours=self.max_age_hours):
+            return f"it is {age.total_seconds() / 3600:.0f} hours old (max {self.max_age_hours:g})"
+        return None
+
+    def _page_file(self, number: int) -> str:
+        return os.path.join(self.path, f"page_{number:06d}.json")
+
+    def _write(self, path: str, content):
+        with atomic_write(path) as tmp_path, open(tmp_path, 'w') as f:
+            json.dump(content, f)
+
+    def pages(self):
+        """
+        Iterate over the pages stored so far.
+
+        Yields:
+            list: The entities of one page.
+        """
+        for number in range(1, self.state["pages"] + 1):
+            with open(self._page_file(number), 'r') as f:
+                yield json.load(f)
+
+    def save_page(self, entities: list, done: bool = False):
+        """
+        Store a fetched page and move the cursor behind it.
+
+        Args:
+            entities (list): The entities of the page.
+            done (bool, optional): True if this was the last page. Defaults to False.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        if entities:
+            self._write(self._page_file(self.state["pages"] + 1), entities)
+            self.state["pages"] += 1
+            self.state["rows"] += len(entities)
+            self.state["after_id"] = entities[-1]["uuid"]
+        self.state["done"] = done
+        self._write(self.state_file, self.state)
+
+    def clear(self):
+        """ Delete the checkpoint after the crawl has been processed """
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -1,30 +1,50 @@
+import threading
 import requests
 
-from helpers.decorators import retry
+from helpers.decorators import FatalError, RetryableError, retry
+from helpers.rate_limit import get_bucket
+from helpers.transport import HttpTransport, get_transport
 from logger import Logger as logger
 
 
 # create own AccessError
-class AccessError(Exception):
+class AccessError(FatalError):
     pass
 
 
 class CrunchbaseClient():
     """ Crunchbase Client """
     max_retries = 5
-    retry_delay = 10
+    retry_delay = 2
+    retry_deadline = 600
+    # Crunchbase answers with CS15x errors when too many requests run at once
+    max_concurrent_requests = 4
+    # Crunchbase allows 200 calls per minute
+    requests_per_minute = 200
 
-    def __init__(self, api_key, base_url):
+    def __init__(self, api_key, base_url, transport: HttpTransport = None, max_concurrent_requests: int = None,
+                 requests_per_minute: int = None):
         """
         Initializes the Crunchbase Client
 
         Args:
             api_key (str): The API key for crunchbase.
             base_url (str): The Crunchbase base url.
+            transport (HttpTransport, optional): The HTTP transport. Defaults to the shared transport.
+            max_concurrent_requests (int, optional): Upper bound for parallel search requests. Defaults to 4.
+            requests_per_minute (int, optional): Upper bound for the request rate. Defaults to 200.
         """
         try:
+            self.transport = transport or get_transport()
+            if max_concurrent_requests:
+                self.max_concurrent_requests = max_concurrent_requests
+            if requests_per_minute:
+                self.requests_per_minute = requests_per_minute
+            self.request_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+            self.rate_limiter = get_bucket("crunchbase", self.requests_per_minute / 60)
             self.API_KEY = api_key
             self.QUERY_URL = base_url + "/searches/organizations"
+            self.ENTITY_URL = base_url + "/entities/organizations"
        # Test API connectivity during initialization
             if not self.test_api_connectivity():
                 raise ConnectionError("Crunchbase API is not reachable")
@@ -51,7 +71,7 @@ class CrunchbaseClient():
             }
 
             # Make a test request to the API with the payload
-            response = requests.post(self.QUERY_URL, json=payload, headers=headers)
+            response = self.transport.post(self.QUERY_URL, json=payload, headers=headers)
             # Check if the response is successful
             if response.status_code == 200:
                 logger.success("Crunchbase API is reachable")
@@ -63,7 +83,7 @@ class CrunchbaseClient():
             logger.error(f"Error testing API connectivity: {e}")
             return False
 
-    @retry(max_retries, retry_delay)
+    @retry(max_retries, retry_delay, deadline=retry_deadline)
     def company_count(self, query: dict) -> int:
         """
         Get the total count of companies matching the given query.
@@ -73,6 +93,10 @@ class CrunchbaseClient():
 
         Returns:
             int: The total count of companies matching the query.
+
+        Raises:
+            AccessError: If the credentials are invalid.
+            requests.exceptions.HTTPError: If the request still fails after all retries.
         """
         try:
             headers = {
@@ -81,21 +105,23 @@ class CrunchbaseClient():
                 "Content-Type": "application/json"
             }
 
-            # Send a POST request to get the count of companies
-            response = requests.post(self.QUERY_URL, params={"user_key": self.API_KEY}, json=query, headers=headers)
-            # Check if the response is successful
-            if response.status_code == 200:
-                result = response.json()
-                total_companies = result["count"]
-                return total_companies
-            else:
-                logger.error("Error in getting company count: Unexpected status code")
-                return 0
+            # never run more requests at once or per minute than Crunchbase allows
+            self.rate_limiter.acquire()
+            with self.request_slots:
+                response = self.transport.post(
+                    self.QUERY_URL, params={"user_key": self.API_KEY}, json=query, headers=headers)
+            if response.status_code == 401:
+                logger.error("Invalid Crunchbase credentials")
+                raise AccessError("Invalid credentials")
+            # Raise an exception for non-successful status codes, the retry decides if it is temporary
+            response.raise_for_status()
+
+            return response.json()["count"]
         except Exception as e:
             logger.error(f"Error in getting company count: {e}")
-            return 0  # Return 0 in case of any error
+            raise
 
-    @retry(max_retries, retry_delay)
+    @retry(max_retries, retry_delay, deadline=retry_deadline)
     def get_data(self, query: dict, after_id: str = None, limit: int = 1000):
         """
         Get data from Crunchbase
@@ -124,8 +150,11 @@ class CrunchbaseClient():
             if after_id:
                 data["after_id"] = after_id
 
-            response = requests.post(
-                self.QUERY_URL, json=data, headers=headers)
+            # never run more requests at once or per minute than Crunchbase allows
+            self.rate_limiter.acquire()
+            with self.request_slots:
+                response = self.transport.post(
+                    self.QUERY_URL, json=data, headers=headers)
             # Handle specific error codes
             if response.status_code == 401:
                 logger.error("Invalid Crunchbase credentials")
@@ -145,14 +174,16 @@ class CrunchbaseClient():
                     logger.error("Invalid URI")
                 elif error_code == "CS106":
                     logger.error("Query timeout exceeded")
+                    raise RetryableError(f"Query timeout exceeded: {error_message}")
                 elif error_code == "CS109":
                     logger.error("Unknown or invalid operator ID")
                 elif error_code == "CS111":
                     logger.error("Invalid specified values or format")
                 elif error_code == "CS112":
                     logger.error("Field ID does not exist")
-                elif error_code.startswith("CS15"):
+                elif error_code and error_code.startswith("CS15"):
                     logger.error("Too many concurrent requests")
+                    raise RetryableError(f"Too many concurrent requests ({error_code}): {error_message}")
                 elif error_code == "CS404":
                     logger.error("Requested resource not found")
             elif response.status_code == 404:
@@ -180,4 +211,58 @@ class CrunchbaseClient():
         except Exception as e:
             logger.error(f"Error in get data from Crunchbase: {e}")
             raise
-    
\ No newline at end of file
+    
+
+    @retry(max_retries, retry_delay, deadline=retry_deadline)
+    def get_entity(self, uuid: str, card_ids: list = None, field_ids: list = None):
+        """
+        Get an organization with its cards, e.g. founders or raised_funding_rounds.
+
+        Args:
+            uuid (str): The UUID of the organization.
+            card_ids (list, optional): The cards to include. Defaults to None.
+            field_ids (list, optional): The fields to include, e.g. categories. Defaults to None.
+
+        Returns:
+            dict: The response with "properties" and "cards", None if the organization does not exist.
+        """
+        try:
+            headers = {
+                "accept": "application/json",
+                "X-cb-user-key": self.API_KEY
+            }
+            params = {}
+            if card_ids:
+                params["card_ids"] = ",".join(card_ids)
+            if field_ids:
+                params["field_ids"] = ",".join(field_ids)
+
+            # never run more requests at once or per minute than Crunchbase allows
+            self.rate_limiter.acquire()
+            with self.request_slots:
+                response = self.transport.get(
+                    f"{self.ENTITY_URL}/{uuid}", params=params, headers=headers)
+            if response.status_code == 401:
+                logger.error("Invalid Crunchbase credentials")
+                raise AccessError("Invalid credentials")
+            elif response.status_code == 404:
+                logger.warning(f"Organization {uuid} not found")
+                return None
+            elif response.status_code == 400:
+                error_message = response.json().get("error", {}).get("message")
+                error_code = response.json().get("error", {}).get("code")
+                if error_code and error_code.startswith("CS15"):
+                    logger.error("Too many concurrent requests")
+                    raise RetryableError(f"Too many concurrent requests ({error_code}): {error_message}")
+                logger.error(f"Invalid entity request ({error_code}): {error_message}")
+
+            # Raise an exception for non-successful status codes
+            response.raise_for_status()
+
+            return response.json()
+        except requests.exceptions.HTTPError as http_err:
+            logger.error(f"HTTP error occurred: {http_err}")
+            raise
+        except Exception as e:
+            logger.error(f"Error in get entity from Crunchbase: {e}")
+            raise
@@ -19,3 +19,6 @@ COLUMN_NAME_MAPPING = {
     "properties.rank_org": "Rank_Org",
     "dwh_partitiondate": "Partition_Date"
 }
+
+# JSON paths of the columns within a Crunchbase search entity
+COLUMN_PATHS = {column: path for path, column in COLUMN_NAME_MAPPING.items()}
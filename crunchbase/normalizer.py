@@ -0,0 +1,79 @@
+import json
+import pandas as pd
+
+from crunchbase.crunchbase_column_rename import COLUMN_PATHS
+
+# pandas dtypes of the BigQuery field types
+FIELD_DTYPES = {
+    "STRING": "string",
+    "INT64": "Int64",
+    "INTEGER": "Int64",
+    "FLOAT64": "Float64",
+    "FLOAT": "Float64",
+    "BOOL": "boolean",
+    "BOOLEAN": "boolean",
+}
+
+
+def to_text(value):
+    """ Convert nested values to JSON so they fit a STRING column """
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def cast_to_schema(dataframe: pd.DataFrame, schema: list) -> pd.DataFrame:
+    """
+    Reduce a dataframe to the schema columns in schema order and cast them to their types.
+
+    Args:
+        dataframe (pd.DataFrame): The dataframe.
+        schema (list): The BigQuery schema.
+
+    Returns:
+        pd.DataFrame: The typed dataframe.
+    """
+    columns = {}
+    for field in schema:
+        values = dataframe[field.name] if field.name in dataframe else pd.Series(None, index=dataframe.index, dtype=object)
+        if field.field_type in ("DATETIME", "TIMESTAMP"):
+            columns[field.name] = pd.to_datetime(values)
+        elif field.field_type in ("INT64", "INTEGER"):
+            columns[field.name] = pd.to_numeric(values).round().astype("Int64")
+        elif field.field_type == "STRING" and values.dtype == object:
+            columns[field.name] = values.map(to_text, na_action="ignore").astype("string")
+        else:
+            columns[field.name] = values.astype(FIELD_DTYPES.get(field.field_type, object))
+    return pd.DataFrame(columns, index=dataframe.index)
+
+
+def project_entities(entities: list, schema: list, extra_columns: list = None) -> pd.DataFrame:
+    """
+    Extract only the schema columns from Crunchbase entities.
+
+    Every declared column is read from its JSON path straight into a typed
+    column instead of flattening whole entities with pd.json_normalize.
+    Schema columns without a JSON path (e.g. City or dwh_partitiondate) are
+    left empty for the caller to derive.
+
+    Args:
+        entities (list): The entities of a search response.
+        schema (list): The BigQuery schema.
+        extra_columns (list, optional): Columns with a JSON path kept untyped after the schema columns. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The projected entities.
+    """
+    names = [field.name for field in schema] + (extra_columns or [])
+    paths = {name: COLUMN_PATHS[name].split(".") for name in names if name in COLUMN_PATHS}
+    values = {name: [] for name in paths}
+    for entity in entities:
+        for name, keys in paths.items():
+            value = entity
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            values[name].append(value)
+    projected = cast_to_schema(pd.DataFrame(values), schema)
+    for name in extra_columns or []:
+        projected[name] = values.get(name, None)
+    return projected
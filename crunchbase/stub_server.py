@@ -0,0 +1,347 @@
+import argparse
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import numpy as np
+from flask import Flask, jsonify, request
+
+from logger import Logger as logger
+
+GERMANY_UUID = "6085b4bf-b18a-1763-a04e-fdde3f6aba94"
+EUROPE_UUID = "6106f5dc-823e-5da8-40d7-51612c0b2c4e"
+
+CITIES = [
+    ("Berlin", "Berlin"),
+    ("Munich", "Bayern"),
+    ("Hamburg", "Hamburg"),
+    ("Cologne", "Nordrhein-Westfalen"),
+    ("Aachen", "Nordrhein-Westfalen"),
+    ("Stuttgart", "Baden-Wurttemberg"),
+    ("Walldorf", "Baden-Wurttemberg"),
+    ("Leipzig", "Sachsen"),
+    ("Frankfurt", "Hessen"),
+    ("Saarbrücken", "Saarland"),
+]
+
+DESCRIPTIONS = [
+    "{name} builds software for small businesses.",
+    "{name} helps manufacturers recycle plastic waste into new granulate.",
+    "{name} offers a platform to repair and refurbish used electronics.",
+    "{name} lets households reuse packaging through a deposit system.",
+    "{name} develops sensors to reduce energy use in buildings.",
+    "{name} is a marketplace that helps people rethink ownership of tools.",
+    "{name} remanufacture industrial pumps and recover energy from residues.",
+]
+
+CATEGORIES = ["Software", "Recycling", "Manufacturing", "Energy Efficiency", "Marketplace", "Consumer Electronics",
+              "Packaging Services", "Sharing Economy", "CleanTech"]
+INVESTMENT_TYPES = ["pre_seed", "seed", "series_a", "series_b", "angel", "grant"]
+
+# predicates on these fields are evaluated, all other predicates are ignored
+DATE_FIELDS = ("created_at", "updated_at")
+
+
+def to_epoch(value: str) -> int:
+    """ Convert a Crunchbase date or timestamp value to epoch seconds """
+    value = value.replace("Z", "+00:00")
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def to_iso(epoch: int) -> str:
+    """ Convert epoch seconds to the timestamp format of Crunchbase """
+    return datetime.fromtimestamp(int(epoch), tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SyntheticOrganizations():
+    """ Deterministic synthetic organizations, ordered by rank_org """
+
+    def __init__(self, count: int, seed: int = 42):
+        """
+        Initializes the synthetic organizations.
+
+        Args:
+            count (int): The number of organizations.
+            seed (int, optional): The random seed. Defaults to 42.
+        """
+        self.count = count
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        start, end = to_epoch("2007-01-01"), int(time.time())
+        self.created_at = rng.integers(start, end, size=count)
+        self.updated_at = self.created_at + rng.integers(0, end - start, size=count)
+        self.updated_at = np.minimum(self.updated_at, end)
+        self.city = rng.integers(0, len(CITIES), size=count)
+        self.description = rng.integers(0, len(DESCRIPTIONS), size=count)
+        self.matches = OrderedDict()
+
+    def uuid(self, index: int) -> str:
+        # the index is encoded in the uuid, so after_id needs no lookup table
+        return str(uuid.UUID(int=(int(index) << 64) | self.seed))
+
+    def index(self, org_uuid: str) -> int:
+        return uuid.UUID(org_uuid).int >> 64
+
+    def matching(self, predicates: list) -> np.ndarray:
+        """
+        Get the indexes of all organizations matching the predicates.
+
+        Args:
+            predicates (list): The query predicates.
+
+        Returns:
+            np.ndarray: The sorted indexes.
+        """
+        key = repr(predicates)
+        if key in self.matches:
+            self.matches.move_to_end(key)
+            return self.matches[key]
+        mask = np.ones(self.count, dtype=bool)
+        for predicate in predicates:
+            field = predicate.get("field_id")
+            operator = predicate.get("operator_id")
+            values = predicate.get("values", [])
+            if field in DATE_FIELDS:
+                column = getattr(self, field)
+                bounds = [to_epoch(value) for value in values]
+                if operator == "gte":
+                    mask &= column >= bounds[0]
+                elif operator == "gt":
+                    mask &= column > bounds[0]
+                elif operator == "lt":
+                    mask &= column < bounds[0]
+                elif operator == "lte":
+                    mask &= column <= bounds[0]
+                elif operator == "between":
+                    mask &= (column >= bounds[0]) & (column <= bounds[1])
+            elif field == "location_identifiers" and operator == "includes":
+                if not {GERMANY_UUID, EUROPE_UUID} & set(values):
+                    mask &= False
+        indexes = np.flatnonzero(mask)
+        self.matches[key] = indexes
+        if len(self.matches) > 64:
+            self.matches.popitem(last=False)
+        return indexes
+
+    def entity(self, index: int, field_ids: list) -> dict:
+        """
+        Build the search entity of an organization.
+
+        Args:
+            index (int): The index of the organization.
+            field_ids (list): The requested fields.
+
+        Returns:
+            dict: The entity.
+        """
+        org_uuid = self.uuid(index)
+        name = f"Company {index}"
+        permalink = f"company-{index}"
+        city, region = CITIES[self.city[index]]
+        properties = {
+            "uuid": org_uuid,
+            "name": name,
+            "permalink": permalink,
+            "identifier": {
+                "uuid": org_uuid,
+                "value": name,
+                "image_id": f"synthetic/{permalink}",
+                "permalink": permalink,
+                "entity_def_id": "organization"
+            },
+            "entity_def_id": "organization",
+            "created_at": to_iso(self.created_at[index]),
+            "updated_at": to_iso(self.updated_at[index]),
+            "facet_ids": ["company"],
+            "facebook": {"value": f"https://www.facebook.com/{permalink}"},
+            "linkedin": {"value": f"https://www.linkedin.com/company/{permalink}"},
+            "twitter": {"value": f"https://twitter.com/{permalink}"},
+            "image_id": f"synthetic/{permalink}",
+            "image_url": f"https://images.example.com/{permalink}.png",
+            "website_url": f"https://www.{permalink}.example.com",
+            "short_description": DESCRIPTIONS[self.description[index]].format(name=name),
+            "rank_org": int(index) + 1,
+            "location_identifiers": [
+                {"uuid": str(uuid.uuid5(uuid.NAMESPACE_URL, city)), "value": city, "permalink": city.lower(),
+                 "location_type": "city", "entity_def_id": "location"},
+                {"uuid": str(uuid.uuid5(uuid.NAMESPACE_URL, region)), "value": region, "permalink": region.lower(),
+                 "location_type": "region", "entity_def_id": "location"},
+                {"uuid": GERMANY_UUID, "value": "Germany", "permalink": "germany",
+                 "location_type": "country", "entity_def_id": "location"},
+                {"uuid": EUROPE_UUID, "value": "Europe", "permalink": "europe",
+                 "location_type": "continent", "entity_def_id": "location"},
+            ],
+        }
+        return {
+            "uuid": org_uuid,
+            "properties": {field: properties[field] for field in field_ids if field in properties}
+        }
+
+    def card(self, index: int, field_ids: list, card_ids: list) -> dict:
+        """
+        Build the entity response of an organization with its cards.
+
+        Args:
+            index (int): The index of the organization.
+            field_ids (list): The requested fields.
+            card_ids (list): The requested cards, founders and raised_funding_rounds are supported.
+
+        Returns:
+            dict: The response.
+        """
+        # every organization gets its own, but reproducible, founders, rounds and categories
+        rng = np.random.default_rng((self.seed, int(index)))
+        org_uuid = self.uuid(index)
+        response = self.entity(index, field_ids)
+        response["properties"]["identifier"] = self.entity(index, ["identifier"])["properties"]["identifier"]
+        if "categories" in field_ids:
+            response["properties"]["categories"] = [
+                {"uuid": str(uuid.uuid5(uuid.NAMESPACE_URL, category)), "value": category,
+                 "permalink": category.lower().replace(" ", "-"), "entity_def_id": "category"}
+                for category in rng.choice(CATEGORIES, size=rng.integers(1, 4), replace=False)
+            ]
+        cards = {}
+        if "founders" in card_ids:
+            cards["founders"] = []
+            for number in range(rng.integers(1, 4)):
+                name = f"Founder {number + 1} of Company {index}"
+                cards["founders"].append({
+                    "identifier": {"uuid": str(uuid.uuid5(uuid.NAMESPACE_URL, name)), "value": name,
+                                   "permalink": name.lower().replace(" ", "-"), "entity_def_id": "person"}
+                })
+        if "raised_funding_rounds" in card_ids:
+            cards["raised_funding_rounds"] = []
+            announced_on = int(self.created_at[index])
+            for number in range(rng.integers(0, 5)):
+                announced_on += int(rng.integers(90, 720)) * 86400
+                investment_type = INVESTMENT_TYPES[rng.integers(0, len(INVESTMENT_TYPES))]
+                money_raised = int(rng.integers(1, 200)) * 50000
+                name = f"{investment_type} - Company {index} ({number + 1})"
+                cards["raised_funding_rounds"].append({
+                    "identifier": {"uuid": str(uuid.uuid5(uuid.NAMESPACE_URL, name)), "value": name,
+                                   "entity_def_id": "funding_round"},
+                    "announced_on": to_iso(announced_on)[:10],
+                    "investment_type": investment_type,
+                    "money_raised": {"value": money_raised, "currency": "USD", "value_usd": money_raised},
+                    "funded_organization_identifier": {"uuid": org_uuid, "value": f"Company {index}"},
+                })
+        response["cards"] = cards
+        return response
+
+
+def create_app(organizations: SyntheticOrganizations, latency: float = 0.0, error_rate: float = 0.0,
+               cs15x_rate: float = 0.0, max_concurrent: int = None) -> Flask:
+    """
+    Create the stand-in for the Crunchbase search and entity API.
+
+    Args:
+        organizations (SyntheticOrganizations): The organizations to serve.
+        latency (float, optional): Seconds added to every response. Defaults to 0.0.
+        error_rate (float, optional): Share of requests answered with 429. Defaults to 0.0.
+        cs15x_rate (float, optional): Share of requests answered with a CS151 error. Defaults to 0.0.
+        max_concurrent (int, optional): Requests in flight above this answer with CS151. Defaults to None.
+
+    Returns:
+        Flask: The app.
+    """
+    app = Flask(__name__)
+    lock = threading.Lock()
+    stats = {"requests": 0, "rows": 0, "rate_limited": 0, "cs15x": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def too_many_concurrent():
+        stats["cs15x"] += 1
+        return jsonify({"error": {"code": "CS151", "message": "Too many concurrent requests"}}), 400
+
+    def simulated(handler):
+        """ Track requests in flight and inject latency and errors before the handler runs """
+        def wrapper(*args, **kwargs):
+            with lock:
+                stats["requests"] += 1
+                stats["in_flight"] += 1
+                stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+                in_flight = stats["in_flight"]
+            try:
+                if latency:
+                    time.sleep(latency)
+                with lock:
+                    if max_concurrent and in_flight > max_concurrent:
+                        return too_many_concurrent()
+                    if random.random() < cs15x_rate:
+                        return too_many_concurrent()
+                    if random.random() < error_rate:
+                        stats["rate_limited"] += 1
+                        return jsonify({"error": {"code": "RL429", "message": "Rate limit exceeded"}}), 429, {"Retry-After": "1"}
+                return handler(*args, **kwargs)
+            finally:
+                with lock:
+                    stats["in_flight"] -= 1
+        wrapper.__name__ = handler.__name__
+        return wrapper
+
+    @app.post("/searches/organizations")
+    @simulated
+    def search_organizations():
+        body = request.get_json(force=True, silent=True) or {}
+        limit = int(body.get("limit", 50))
+        if limit > 1000:
+            return jsonify({"error": {"code": "MD403", "message": "Limit must not exceed 1000"}}), 400
+        indexes = organizations.matching(body.get("query", []))
+        start = 0
+        if body.get("after_id"):
+            start = int(np.searchsorted(indexes, organizations.index(body["after_id"]), side="right"))
+        page = indexes[start:start + limit]
+        field_ids = body.get("field_ids", ["name"])
+        entities = [organizations.entity(index, field_ids) for index in page]
+        with lock:
+            stats["rows"] += len(entities)
+        return jsonify({"count": int(len(indexes)), "entities": entities})
+
+    @app.get("/entities/organizations/<org_uuid>")
+    @simulated
+    def get_organization(org_uuid):
+        try:
+            index = organizations.index(org_uuid)
+        except ValueError:
+            index = -1
+        if not 0 <= index < organizations.count or organizations.uuid(index) != org_uuid:
+            return jsonify({"error": {"code": "CS404", "message": "Entity not found"}}), 404
+        field_ids = [field for field in request.args.get("field_ids", "").split(",") if field]
+        card_ids = [card for card in request.args.get("card_ids", "").split(",") if card]
+        with lock:
+            stats["rows"] += 1
+        return jsonify(organizations.card(index, field_ids, card_ids))
+
+    @app.get("/stats")
+    def get_stats():
+        with lock:
+            return jsonify(stats)
+
+    return app
+
+
+def parse_arguments():
+    """ Parse arguments """
+    parser = argparse.ArgumentParser(description='Local stand-in for the Crunchbase search and entity API.')
+    parser.add_argument('--companies', type=int, default=10000, help='Number of synthetic organizations')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed of the synthetic data')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='Share of requests answered with 429')
+    parser.add_argument('--cs15x_rate', type=float, default=0.0, help='Share of requests answered with CS151')
+    parser.add_argument('--max_concurrent', type=int, default=None, help='Answer with CS151 above this many requests in flight')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    ARGS = parse_arguments()
+    logger.info(f"Generating {ARGS.companies} synthetic organizations")
+    ORGANIZATIONS = SyntheticOrganizations(ARGS.companies, ARGS.seed)
+    APP = create_app(ORGANIZATIONS, ARGS.latency, ARGS.error_rate, ARGS.cs15x_rate, ARGS.max_concurrent)
+    logger.success(f"Crunchbase stand-in listening on http://127.0.0.1:{ARGS.port}")
+    APP.run(host="127.0.0.1", port=ARGS.port, threaded=True)
@@ -0,0 +1,180 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from helpers.atomic import atomic_write, finish_write, temporary_path
+
+from logger import Logger as logger
+
+REPORTING_FOLDER = "reporting"
+
+# write a CSV copy next to every Parquet artifact
+_csv_export = False
+
+
+def configure_artifacts(csv_export: bool = False):
+    """
+    Set how artifacts are written.
+
+    Args:
+        csv_export (bool, optional): Also write every artifact as CSV. Defaults to False.
+    """
+    global _csv_export
+    _csv_export = csv_export
+
+
+def artifact_path(name: str, extension: str = "parquet") -> str:
+    """
+    Get the path of an artifact in the 'reporting' folder.
+
+    Args:
+        name (str): The artifact name, e.g. "crunchbase".
+        extension (str, optional): The file extension. Defaults to "parquet".
+
+    Returns:
+        str: The path.
+    """
+    return os.path.join(REPORTING_FOLDER, f"{name}.{extension}")
+
+
+def artifact_exists(name: str) -> bool:
+    """
+    Check if an artifact exists as Parquet or CSV.
+
+    Args:
+        name (str): The artifact name.
+
+    Returns:
+        bool: True if it exists.
+    """
+    return os.path.exists(artifact_path(name)) or os.path.exists(artifact_path(name, "csv"))
+
+
+def write_artifact(dataframe: pd.DataFrame, name: str):
+    """
+    Write a stage result as compressed Parquet and optionally as CSV, replacing the previous files only once complete.
+
+    Args:
+        dataframe (pd.DataFrame): The stage result.
+        name (str): The artifact name.
+    """
+    os.makedirs(REPORTING_FOLDER, exist_ok=True)
+    path = artifact_path(name)
+    logger.debug(f"Saving {name} to {path}")
+    with atomic_write(path) as tmp_path:
+        dataframe.to_parquet(tmp_path, index=False, compression="zstd")
+    if _csv_export:
+        with atomic_write(artifact_path(name, "csv")) as tmp_path:
+            dataframe.to_csv(tmp_path, index=False)
+
+
+def read_artifact(name: str, columns: list = None) -> pd.DataFrame:
+    """
+    Read a stage result, loading only the given columns.
+
+    Falls back to the CSV file for artifacts written before the Parquet format.
+
+    Args:
+        name (str): The artifact name.
+        columns (list, optional): The columns to load. Defaults to all columns.
+
+    Returns:
+        pd.DataFrame: The stage result.
+    """
+    path = artifact_path(name)
+    if os.path.exists(path):
+        logger.debug(f"Loading {name} from {path}")
+        return pd.read_parquet(path, columns=columns)
+    csv_path = artifact_path(name, "csv")
+    if os.path.exists(csv_path):
+        logger.debug(f"Loading {name} from {csv_path}")
+        return pd.read_csv(csv_path, usecols=columns)
+    raise FileNotFoundError(f"Artifact {name} not found in {REPORTING_FOLDER}")
+
+
+def iter_artifact(name: str, columns: list = None, chunk_rows: int = 100000):
+    """
+    Read a stage result in chunks, so only one chunk is held in memory.
+
+    Falls back to the CSV file for artifacts written before the Parquet format.
+
+    Args:
+        name (str): The artifact name.
+        columns (list, optional): The columns to load. Defaults to all columns.
+        chunk_rows (int, optional): The rows per chunk. Defaults to 100000.
+
+    Yields:
+        pd.DataFrame: The next chunk.
+    """
+    path = artifact_path(name)
+    if os.path.exists(path):
+        logger.debug(f"Streaming {name} from {path}")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+    csv_path = artifact_path(name, "csv")
+    if os.path.exists(csv_path):
+        logger.debug(f"Streaming {name} from {csv_path}")
+        yield from pd.read_csv(csv_path, usecols=columns, chunksize=chunk_rows)
+        return
+    raise FileNotFoundError(f"Artifact {name} not found in {REPORTING_FOLDER}")
+
+
+class ArtifactWriter():
+    """ Writes an artifact chunk by chunk without holding it in memory """
+
+    def __init__(self, name: str, schema: pa.Schema = None):
+        """
+        Initializes the writer. The artifact replaces the previous one on close.
+
+        Args:
+            name (str): The artifact name.
+            schema (pa.Schema, optional): The schema of every chunk. Defaults to the types of the first chunk,
+                which fails on later chunks if a column of the first one is empty.
+        """
+        os.makedirs(REPORTING_FOLDER, exist_ok=True)
+        self.name = name
+        self.path = artifact_path(name)
+        self.csv_path = artifact_path(name, "csv")
+        self.writer = None
+        self.schema = schema
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(discard=exc_type is not None)
+
+    def write(self, dataframe: pd.DataFrame):
+        """
+        Append a chunk to the artifact.
+
+        Args:
+            dataframe (pd.DataFrame): The chunk, with the same columns as the first one.
+        """
+        table = pa.Table.from_pandas(dataframe, schema=self.schema, preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = pq.ParquetWriter(temporary_path(self.path), self.schema, compression="zstd")
+        self.writer.write_table(table)
+        if _csv_export:
+            dataframe.to_csv(temporary_path(self.csv_path), index=False, mode="a", header=self.rows == 0)
+        self.rows += len(dataframe)
+
+    def close(self, discard: bool = False):
+        """
+        Finish the artifact.
+
+        Args:
+            discard (bool, optional): Drop the partial artifact and keep the previous one. Defaults to False.
+        """
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.writer = None
+        for path in (self.path, self.csv_path):
+            finish_write(path, discard)
+        if not discard:
+            logger.debug(f"Saved {self.rows} rows to {self.path}")
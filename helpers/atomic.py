@@ -0,0 +1,47 @@
+import os
+from contextlib import contextmanager
+
+
+def temporary_path(path: str) -> str:
+    """ Get the path a file is written to before it replaces path """
+    return path + ".tmp"
+
+
+def finish_write(path: str, discard: bool = False):
+    """
+    Move the temporary file onto path, or remove it and keep the previous file.
+
+    Args:
+        path (str): The final path.
+        discard (bool, optional): Remove the temporary file instead. Defaults to False.
+    """
+    tmp_path = temporary_path(path)
+    if not os.path.exists(tmp_path):
+        return
+    if discard:
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+@contextmanager
+def atomic_write(path: str):
+    """
+    Write a file so readers see either the previous or the complete new file, never a half written one.
+
+    Example:
+        with atomic_write(path) as tmp_path:
+            dataframe.to_parquet(tmp_path)
+
+    Args:
+        path (str): The final path.
+
+    Yields:
+        str: The temporary path to write to, it replaces path if the block succeeds and is removed if it fails.
+    """
+    try:
+        yield temporary_path(path)
+    except BaseException:
+        finish_write(path, discard=True)
+        raise
+    finish_write(path)
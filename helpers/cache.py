@@ -0,0 +1,41 @@
+import os
+import json
+from helpers.atomic import atomic_write
+from logger import Logger as logger
+
+
+def get_cache_path(cache_file):
+    """
+    Get the path of a cache file in the 'cache' folder and create the folder if needed.
+
+    Args:
+        cache_file (str): The name of the cache file.
+
+    Returns:
+        str: The path of the cache file.
+    """
+    cache_folder = os.path.join(os.getcwd(), 'cache')
+    if not os.path.exists(cache_folder):
+        os.makedirs(cache_folder)
+    return os.path.join(cache_folder, cache_file)
+
+
+# Function to load or create cache in the 'cache' folder
+def load_cache(cache_file):
+    cache_file_path = get_cache_path(cache_file)
+
+    if os.path.exists(cache_file_path):
+        logger.info(f"Loading cache from {cache_file_path}")
+        with open(cache_file_path, 'r') as f:
+            return json.load(f)
+    logger.info(f"No cache found. Starting fresh.")
+    return {}
+
+
+# Function to save cache to a file in the 'cache' folder
+def save_cache(cache, cache_file):
+    cache_file_path = get_cache_path(cache_file)
+
+    logger.info(f"Saving cache to {cache_file_path}")
+    with atomic_write(cache_file_path) as tmp_path, open(tmp_path, 'w') as f:
+        json.dump(cache, f)
@@ -1,22 +1,132 @@
 import time
+import random
+import functools
+from email.utils import parsedate_to_datetime
+import requests
 from logger import Logger as logger
 
+# HTTP status codes that signal throttling or a temporary problem of the upstream
+RETRYABLE_STATUS_CODES = {408, 409, 429}
 
-def retry(max_retries: int, retry_delay: int):
+
+class FatalError(Exception):
+    """ Error that must not be retried, e.g. invalid credentials """
+    pass
+
+
+class RetryableError(Exception):
+    """ Error that should be retried, optionally after a given number of seconds """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def get_status_code(error):
+    """
+    Get the HTTP status code of an error if it carries one.
+
+    Args:
+        error (Exception): The error.
+
+    Returns:
+        int: The status code or None.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None:
+        # google.api_core exceptions carry the status as code
+        status = getattr(error, 'code', None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error) -> bool:
+    """
+    Decide if an error is worth another attempt.
+
+    Connection problems, timeouts, throttling (409, 429) and server errors are retried,
+    invalid requests and credentials (400, 401, 403, 404, ...) fail immediately.
+    Errors without a status, e.g. a KeyError of a malformed response, are bugs
+    and fail immediately as well.
+
+    Args:
+        error (Exception): The error.
+
+    Returns:
+        bool: True if the call should be retried.
+    """
+    if isinstance(error, FatalError):
+        return False
+    if isinstance(error, RetryableError):
+        return True
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    status = get_status_code(error)
+    if status is None:
+        return False
+    return status in RETRYABLE_STATUS_CODES or status >= 500
+
+
+def get_retry_after(error):
+    """
+    Get the delay requested by the upstream, e.g. via a Retry-After header.
+
+    Args:
+        error (Exception): The error.
+
+    Returns:
+        float: The delay in seconds or None.
+    """
+    if getattr(error, 'retry_after', None) is not None:
+        return float(error.retry_after)
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def retry(max_retries: int, retry_delay: float, max_delay: float = 60, deadline: float = None):
+    """
+    Retry a method with exponential backoff and jitter.
+
+    Args:
+        max_retries (int): The maximum number of attempts.
+        retry_delay (float): The base delay in seconds, doubled with every attempt.
+        max_delay (float, optional): The upper bound of a single delay. Defaults to 60.
+        deadline (float, optional): Seconds after which a call gives up, including all retries. Defaults to None.
+    """
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(self, *args, **kwargs):
+            started = time.monotonic()
             for retry in range(max_retries):
                 try:
                     result = func(self, *args, **kwargs)
                     return result
                 except Exception as e:
-                    logger.error(f"Error connecting to the database: {str(e)}")
-                    if retry < max_retries - 1:
-                        logger.info(f"Retrying in {retry_delay} seconds...")
-                        time.sleep(retry_delay)
-                    else:
+                    if not is_retryable(e):
+                        logger.error(f"Error in {func.__qualname__} is not retryable: {str(e)}")
+                        raise e
+                    logger.error(f"Error in {func.__qualname__}: {str(e)}")
+                    if retry >= max_retries - 1:
                         logger.error("Max retry attempts reached.")
                         raise e
+                    delay = get_retry_after(e)
+                    if delay is None:
+                        backoff = min(max_delay, retry_delay * 2 ** retry)
+                        delay = backoff / 2 + random.uniform(0, backoff / 2)
+                    if deadline is not None and time.monotonic() - started + delay > deadline:
+                        logger.error(f"Deadline of {deadline} seconds reached.")
+                        raise e
+                    logger.info(f"Retrying in {delay:.1f} seconds...")
+                    time.sleep(delay)
         return wrapper
     return decorator
 
@@ -0,0 +1,74 @@
+import time
+import threading
+
+from logger import Logger as logger
+
+
+class TokenBucket():
+    """ Token bucket limiting the request rate to one upstream """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Initializes the token bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float, optional): Maximum burst size. Defaults to one second of tokens (at least 1).
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket and wait until enough are available.
+
+        Args:
+            tokens (float, optional): The number of tokens. Defaults to 1.
+
+        Returns:
+            float: The seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(name: str, rate: float, capacity: float = None) -> TokenBucket:
+    """
+    Get the shared token bucket of an upstream, creating it on first use.
+
+    The first caller sets the rate of an upstream. A later call asking for another
+    rate gets the existing bucket and a warning, as all clients share one quota.
+
+    Args:
+        name (str): The upstream name, e.g. "crunchbase".
+        rate (float): Requests per second.
+        capacity (float, optional): Maximum burst size. Defaults to one second of requests (at least 1).
+
+    Returns:
+        TokenBucket: The token bucket.
+    """
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(rate, capacity)
+        bucket = _buckets[name]
+        if bucket.rate != rate or (capacity is not None and bucket.capacity != capacity):
+            logger.warning(f"The {name} rate limit stays at {bucket.rate * 60:g} requests per minute, "
+                           f"{rate * 60:g} requested")
+        return bucket
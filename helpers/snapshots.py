@@ -0,0 +1,174 @@
+import os
+import shutil
+from datetime import date, datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from helpers.artifacts import REPORTING_FOLDER, artifact_path
+from logger import Logger as logger
+
+SNAPSHOT_FOLDER = os.path.join(REPORTING_FOLDER, "snapshots")
+
+# one snapshot per artifact and day, the last run of a day replaces the earlier ones
+PARTITIONING = ds.partitioning(pa.schema([("run_date", pa.string())]), flavor="hive")
+
+# set anew by every run, so they are not compared by default
+LOAD_METADATA_COLUMNS = ["dwh_partitiondate"]
+
+
+def snapshot_dir(name: str) -> str:
+    return os.path.join(SNAPSHOT_FOLDER, name)
+
+
+def to_run_date(value) -> str:
+    """ Format a date, datetime or ISO string as run date """
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def snapshot_artifact(name: str, run_date=None):
+    """
+    Store the current Parquet artifact as the snapshot of a run date.
+
+    The file is copied, so storing a snapshot never loads it into memory.
+
+    Args:
+        name (str): The artifact name, e.g. "crunchbase".
+        run_date (date, optional): The run date. Defaults to today.
+    """
+    run_date = to_run_date(run_date or date.today())
+    partition = os.path.join(snapshot_dir(name), f"run_date={run_date}")
+    os.makedirs(partition + ".tmp", exist_ok=True)
+    shutil.copyfile(artifact_path(name), os.path.join(partition + ".tmp", "part-0.parquet"))
+    # swap the partition in at once so readers never see a half written snapshot
+    if os.path.exists(partition):
+        os.replace(partition, partition + ".old")
+    os.replace(partition + ".tmp", partition)
+    shutil.rmtree(partition + ".old", ignore_errors=True)
+    logger.debug(f"Saved snapshot {name} of {run_date} to {partition}")
+
+
+def list_snapshots(name: str) -> list:
+    """
+    List the run dates of an artifact, oldest first.
+
+    Args:
+        name (str): The artifact name.
+
+    Returns:
+        list: The run dates as "YYYY-MM-DD".
+    """
+    directory = snapshot_dir(name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        entry.split("=", 1)[1] for entry in os.listdir(directory)
+        if entry.startswith("run_date=") and not entry.endswith((".tmp", ".old"))
+    )
+
+
+def read_snapshot(name: str, run_date, columns: list = None, filter: ds.Expression = None) -> pd.DataFrame:
+    """
+    Read the snapshot of one run date. Only the partition, the columns and the rows asked for are read.
+
+    Args:
+        name (str): The artifact name.
+        run_date (date): The run date.
+        columns (list, optional): The columns to load. Defaults to all columns.
+        filter (ds.Expression, optional): A row filter, e.g. ds.field("Country") == "Germany". Defaults to None.
+
+    Returns:
+        pd.DataFrame: The snapshot.
+    """
+    run_date = to_run_date(run_date)
+    if run_date not in list_snapshots(name):
+        raise FileNotFoundError(f"No snapshot of {name} on {run_date} in {SNAPSHOT_FOLDER}")
+    dataset = ds.dataset(snapshot_dir(name), format="parquet", partitioning=PARTITIONING,
+                         exclude_invalid_files=True)
+    expression = ds.field("run_date") == run_date
+    if filter is not None:
+        expression = expression & filter
+    if columns is None:
+        columns = [column for column in dataset.schema.names if column != "run_date"]
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def read_latest(name: str, columns: list = None, filter: ds.Expression = None) -> pd.DataFrame:
+    """
+    Read the newest snapshot of an artifact.
+
+    Args:
+        name (str): The artifact name.
+        columns (list, optional): The columns to load. Defaults to all columns.
+        filter (ds.Expression, optional): A row filter. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The snapshot.
+    """
+    run_dates = list_snapshots(name)
+    if not run_dates:
+        raise FileNotFoundError(f"No snapshot of {name} in {SNAPSHOT_FOLDER}")
+    return read_snapshot(name, run_dates[-1], columns, filter)
+
+
+def read_as_of(name: str, as_of, columns: list = None, filter: ds.Expression = None) -> pd.DataFrame:
+    """
+    Read the snapshot that was current on a date, i.e. the newest one not after it.
+
+    Args:
+        name (str): The artifact name.
+        as_of (date): The date.
+        columns (list, optional): The columns to load. Defaults to all columns.
+        filter (ds.Expression, optional): A row filter. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The snapshot.
+    """
+    as_of = to_run_date(as_of)
+    run_dates = [run_date for run_date in list_snapshots(name) if run_date <= as_of]
+    if not run_dates:
+        raise FileNotFoundError(f"No snapshot of {name} on or before {as_of} in {SNAPSHOT_FOLDER}")
+    return read_snapshot(name, run_dates[-1], columns, filter)
+
+
+def diff_snapshots(name: str, old_run_date, new_run_date, key: str = "UUID", columns: list = None) -> pd.DataFrame:
+    """
+    Compare two snapshots by key.
+
+    Only the key and the compared columns of the two snapshots are loaded.
+
+    Args:
+        name (str): The artifact name.
+        old_run_date (date): The run date of the older snapshot.
+        new_run_date (date): The run date of the newer snapshot.
+        key (str, optional): The column identifying a row. Defaults to "UUID".
+        columns (list, optional): The columns to compare. Defaults to all columns except LOAD_METADATA_COLUMNS.
+
+    Returns:
+        pd.DataFrame: The added, removed and changed rows with a "change" column,
+        holding the new values or, for removed rows, the old values.
+    """
+    if columns is not None:
+        columns = [key] + [column for column in columns if column != key]
+    old = read_snapshot(name, old_run_date, columns).drop_duplicates(key).set_index(key)
+    new = read_snapshot(name, new_run_date, columns).drop_duplicates(key).set_index(key)
+    compared = [column for column in new.columns if column in old.columns
+                and (columns is not None or column not in LOAD_METADATA_COLUMNS)]
+    old_hash = pd.util.hash_pandas_object(old[compared], index=False)
+    new_hash = pd.util.hash_pandas_object(new[compared], index=False)
+
+    added = new.index.difference(old.index)
+    removed = old.index.difference(new.index)
+    common = new.index.intersection(old.index)
+    changed = common[new_hash.loc[common].to_numpy() != old_hash.loc[common].to_numpy()]
+
+    diff = pd.concat([
+        new.loc[added].assign(change="added"),
+        old.loc[removed].assign(change="removed"),
+        new.loc[changed].assign(change="changed"),
+    ])
+    logger.info(f"{name} {to_run_date(old_run_date)} -> {to_run_date(new_run_date)}: "
+                f"{len(added)} added, {len(removed)} removed, {len(changed)} changed")
+    return diff.reset_index()
@@ -0,0 +1,87 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+from logger import Logger as logger
+
+
+class HttpTransport():
+    """ Shared HTTP transport with pooled keep-alive connections """
+
+    def __init__(self, connect_timeout=5.0, read_timeout=60.0, pool_connections=10, pool_maxsize=10):
+        """
+        Initializes the HTTP transport.
+
+        Args:
+            connect_timeout (float, optional): Seconds to wait for a connection. Defaults to 5.0.
+            read_timeout (float, optional): Seconds to wait for a response. Defaults to 60.0.
+            pool_connections (int, optional): Number of hosts to keep a pool for. Defaults to 10.
+            pool_maxsize (int, optional): Number of connections kept per host. Defaults to 10.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+    def request(self, method, url, **kwargs) -> requests.Response:
+        """
+        Send a request over the pooled session.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The url.
+            **kwargs: Passed on to requests (headers, params, json, ...).
+
+        Returns:
+            requests.Response: The response.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """ Close all pooled connections """
+        self.session.close()
+
+
+_transport = None
+
+
+def configure_transport(connect_timeout=5.0, read_timeout=60.0, pool_connections=10, pool_maxsize=10) -> HttpTransport:
+    """
+    Replace the shared transport with one using the given settings.
+
+    Args:
+        connect_timeout (float, optional): Seconds to wait for a connection. Defaults to 5.0.
+        read_timeout (float, optional): Seconds to wait for a response. Defaults to 60.0.
+        pool_connections (int, optional): Number of hosts to keep a pool for. Defaults to 10.
+        pool_maxsize (int, optional): Number of connections kept per host. Defaults to 10.
+
+    Returns:
+        HttpTransport: The new shared transport.
+    """
+    global _transport
+    if _transport is not None:
+        _transport.close()
+    _transport = HttpTransport(connect_timeout, read_timeout, pool_connections, pool_maxsize)
+    logger.debug(f"HTTP transport configured (timeout={_transport.timeout}, pool_maxsize={pool_maxsize})")
+    return _transport
+
+
+def get_transport() -> HttpTransport:
+    """
+    Get the shared transport, creating it with default settings if needed.
+
+    Returns:
+        HttpTransport: The shared transport.
+    """
+    global _transport
+    if _transport is None:
+        _transport = HttpTransport()
+    return _transport
@@ -1,24 +1,34 @@
 import requests
 import openai
-from helpers.decorators import retry
+from helpers.decorators import FatalError, retry
+from helpers.rate_limit import get_bucket
+from helpers.transport import HttpTransport, get_transport
 from logger import Logger as logger
 
-class AccessError(Exception):
+class AccessError(FatalError):
     pass
 
 class OpenAIClient():
     """ Open AI Client """
     max_retries = 5
-    retry_delay = 10
+    retry_delay = 2
+    retry_deadline = 300
+    requests_per_minute = 60
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, transport: HttpTransport = None, requests_per_minute: int = None):
         """
         Initializes the OpenAI Client.
 
         Args:
             OPENAI_API_KEY (str): The API key for OpenAI.
+            transport (HttpTransport, optional): The HTTP transport. Defaults to the shared transport.
+            requests_per_minute (int, optional): Upper bound for the request rate. Defaults to 60.
         """
         try:
+            self.transport = transport or get_transport()
+            if requests_per_minute:
+                self.requests_per_minute = requests_per_minute
+            self.rate_limiter = get_bucket("openai", self.requests_per_minute / 60)
             self.OPENAI_API_KEY = api_key
             openai.api_key = self.OPENAI_API_KEY
 
@@ -35,7 +45,7 @@ class OpenAIClient():
         Test API connectivity by making a test request to the OpenAI API.
         """
         try:
-            response = requests.get("https://api.openai.com/v1/models", headers={"Authorization": f"Bearer {self.OPENAI_API_KEY}"})
+            response = self.transport.get("https://api.openai.com/v1/models", headers={"Authorization": f"Bearer {self.OPENAI_API_KEY}"})
             if response.status_code == 200:
                 logger.success("OpenAI API is reachable")
                 return True
@@ -46,6 +56,7 @@ class OpenAIClient():
             logger.error(f"Error testing API connectivity: {e}")
             return False
 
+    @retry(max_retries, retry_delay, deadline=retry_deadline)
     def get_openai_response(self, messages, model="gpt-3.5-turbo", max_tokens=100, temperature=0.7):
         """
         Sends a chat request to the OpenAI API using the GPT-3.5 Turbo model via `requests.post()`.
@@ -73,7 +84,8 @@ class OpenAIClient():
         }
 
         try:
-            response = requests.post(url, headers=headers, json=data)
+            self.rate_limiter.acquire()
+            response = self.transport.post(url, headers=headers, json=data)
 
             if response.status_code == 200:
                 logger.success("Successfully received a response from OpenAI")
@@ -82,8 +94,12 @@ class OpenAIClient():
                 return response.json()['choices'][0]['message']['content'].strip()
             else:
                 logger.error(f"Error: {response.status_code} - {response.text}")
+                if response.status_code == 401:
+                    raise AccessError(f"Invalid OpenAI credentials: {response.text}")
+                # throttling and server errors are retried, other client errors fail immediately
+                response.raise_for_status()
                 raise AccessError(f"Failed to retrieve data from OpenAI API: {response.text}")
         
         except requests.exceptions.RequestException as e:
             logger.error(f"Request to OpenAI failed: {e}")
-            raise AccessError("Failed to retrieve data from OpenAI API") from e
+            raise
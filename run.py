@@ -7,12 +7,15 @@ from openai_request.client import OpenAIClient
 from tasks import (
     analysis,
     crunchbase,
+    enrichment,
     linkedin,
     validation,
     mapping
 )
 
 from config import Config
+from helpers.artifacts import configure_artifacts
+from helpers.transport import configure_transport
 
 from logger import Logger as logger
 
@@ -23,15 +26,37 @@ if __name__ == "__main__":
     # Step 1: Get Arguments and Environment Variables to set Config
 
     CONFIG = Config()
+    configure_artifacts(csv_export=CONFIG.CSV_EXPORT)
+
     # Step 2: Create Clients depending on Config
 
     logger.info("Create Clients")
+    # shared HTTP transport for Crunchbase, Open AI and Nominatim
+    configure_transport(
+        connect_timeout=CONFIG.HTTP_CONNECT_TIMEOUT,
+        read_timeout=CONFIG.HTTP_READ_TIMEOUT,
+        pool_connections=CONFIG.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=CONFIG.HTTP_POOL_MAXSIZE
+    )
     # create Bigquery Client if needed
-    if CONFIG.BIGQUERY_NEEDED:
+    if CONFIG.BIGQUERY_NEEDED and CONFIG.BIGQUERY_BACKEND == "local":
+        logger.log("Creating local BigQuery Client")
+        # imported here, duckdb is only needed for the local backend
+        from bigquery.local_client import LocalBigQueryClient
+        BQClient = LocalBigQueryClient(
+            project_id=CONFIG.PROJECT_ID,
+            dataset_name=CONFIG.DATASET_ID,
+            database=CONFIG.BIGQUERY_LOCAL_DATABASE,
+            load_chunk_mb=CONFIG.BIGQUERY_LOAD_CHUNK_MB
+        )
+    elif CONFIG.BIGQUERY_NEEDED:
         logger.log("Creating BigQuery Client")
         BQClient = BigQueryClient(
             project_id=CONFIG.PROJECT_ID,
-            dataset_name=CONFIG.DATASET_ID
+            dataset_name=CONFIG.DATASET_ID,
+            load_chunk_mb=CONFIG.BIGQUERY_LOAD_CHUNK_MB,
+            cache_dir=CONFIG.BIGQUERY_CACHE_DIR,
+            scan_guard=CONFIG.BIGQUERY_SCAN_GUARD
         )
     else:
         logger.log("BigQuery is not needed")
@@ -42,8 +67,10 @@ if __name__ == "__main__":
         logger.log("Creating Crunchbase Client")
         CRUNCHBASE = CrunchbaseClient(
             CONFIG.CRUNCHBASE_API_KEY,
-            CONFIG.CRUNCHBASE_BASE_URL
+            CONFIG.CRUNCHBASE_BASE_URL,
             # CONFIG.CRUNCHBASE_BASE_API
+            max_concurrent_requests=CONFIG.CRUNCHBASE_MAX_CONCURRENCY,
+            requests_per_minute=CONFIG.CRUNCHBASE_REQUESTS_PER_MINUTE
         )
     else:
         logger.log("Crunchbase is not needed")
@@ -64,7 +91,8 @@ if __name__ == "__main__":
     if CONFIG.OPENAI_NEEDED:
         logger.log("Creating Open AI Client")
         OPENAI = OpenAIClient(
-            CONFIG.OPENAI_API_KEY
+            CONFIG.OPENAI_API_KEY,
+            requests_per_minute=CONFIG.OPENAI_REQUESTS_PER_MINUTE
         )
     else:
         logger.log("Open AI is not needed")
@@ -80,43 +108,86 @@ if __name__ == "__main__":
     if CONFIG.DO_DOWNLOAD:
         logger.info("Start Download Job")
         # run job
-        crunchbase.run_job(CRUNCHBASE, BQClient, CONFIG.DO_UPLOAD)
+        crunchbase.run_job(
+            CRUNCHBASE,
+            BQClient,
+            CONFIG.DO_UPLOAD,
+            workers=CONFIG.CRAWL_WORKERS,
+            location_uuids=CONFIG.CRAWL_LOCATION_UUIDS,
+            delta=CONFIG.DO_DELTA,
+            checkpoint_dir=CONFIG.CRUNCHBASE_CHECKPOINT_DIR,
+            checkpoint_max_age_hours=CONFIG.CRUNCHBASE_CHECKPOINT_MAX_AGE_HOURS,
+            pipeline=CONFIG.DO_PIPELINE,
+            chunk_rows=CONFIG.PIPELINE_CHUNK_ROWS,
+            upsert=CONFIG.DO_UPSERT
+        )
         logger.success("Finished Download Job")
 
-    # without upload to BQ
+    if CONFIG.DO_ENRICHMENT:
+        logger.info("Start Enrichment Job")
+        # run job
+        enrichment.run_job(
+            CRUNCHBASE,
+            BQClient,
+            CONFIG.DO_UPLOAD,
+            workers=CONFIG.ENRICHMENT_WORKERS
+        )
+        logger.success("Finished Enrichment Job")
+
+    # uploaded in batches if the upload flag is set
     if CONFIG.DO_LINKEDIN:
         logger.info("start linkedin job")
         # run job
-        linkedin.run_job(LINKEDIN)
+        linkedin.run_job(
+            LINKEDIN,
+            BQClient,
+            CONFIG.DO_UPLOAD,
+            batch_rows=CONFIG.UPLOAD_BATCH_ROWS,
+            flush_seconds=CONFIG.UPLOAD_FLUSH_SECONDS
+        )
         logger.success("finished linkedin Job")
     
-    # without upload to BQ
+    # uploaded if the upload flag is set
     if CONFIG.DO_ANALYSIS:
         logger.info("Start analysis Job")
-        analysis.run_job()
+        analysis.run_job(
+            BQClient,
+            CONFIG.DO_UPLOAD,
+            workers=CONFIG.ANALYSIS_WORKERS,
+            chunk_rows=CONFIG.ANALYSIS_CHUNK_ROWS,
+            stream=CONFIG.ANALYSIS_STREAM,
+            stream_rows=CONFIG.ANALYSIS_STREAM_ROWS
+        )
         logger.info("Finished analysis Job")
 
     # without upload to BQ
     if CONFIG.DO_MAPPING:
         logger.info("Start mapping Job")
         logger.log("Generating map based on categorized data")
-        output_csv = "reporting/categorized_crunchbase_with_address.csv"
-        mapping.generate_germany_map(output_csv, "img/unvalidated/germany_re_strategy_map.png")
+        mapping.generate_germany_map("categorized_crunchbase_with_address", "img/unvalidated/germany_re_strategy_map.png")
         logger.log("Done with unvalidated data mapping")
         logger.log("Generating map based on validated categorized data")
-        categorized_csv = 'reporting/categorized_crunchbase_with_openai_responses.csv'
+        categorized_artifact = 'categorized_crunchbase_with_openai_responses'
         # Call the function to generate maps for the validation results
-        mapping.generate_germany_map_with_validation_disagree(categorized_csv, "img/validated/disagree/germany_re_strategy_map_validated_disagree.png")
-        mapping.generate_germany_map_with_validation_agree(categorized_csv, "img/validated/agree/germany_re_strategy_map_validated_agree.png")
+        mapping.generate_germany_map_with_validation_disagree(categorized_artifact, "img/validated/disagree/germany_re_strategy_map_validated_disagree.png")
+        mapping.generate_germany_map_with_validation_agree(categorized_artifact, "img/validated/agree/germany_re_strategy_map_validated_agree.png")
         logger.info("Finished mapping Job")
 
-    # without upload to BQ
+    # uploaded in batches if the upload flag is set
     if CONFIG.DO_OPENAI:
         logger.info("Start validation job")
         # run job
-        validation.run_job(OPENAI, CONFIG.DO_OPENAI)
+        validation.run_job(
+            OPENAI,
+            BQClient,
+            CONFIG.DO_UPLOAD,
+            batch_rows=CONFIG.UPLOAD_BATCH_ROWS,
+            flush_seconds=CONFIG.UPLOAD_FLUSH_SECONDS
+        )
         logger.success("Finished validation job")
     # Programm finished
+    if BQClient is not None and BQClient.query_cache is not None:
+        BQClient.query_cache.log_stats()
 
     _e_time = time.time()
     logger.log(f"Programm finished in {_e_time - _s_time} seconds")
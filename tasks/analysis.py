@@ -1,54 +1,130 @@
-import os
 import pandas as pd
-from company_keywords.keywords import Keywords
+from datetime import datetime
+from bigquery.client import BigQueryClient
+from bigquery.job_manager import JobManager
+from bigquery.job_config import CATEGORIZED_CONFIG
+from bigquery.schemes.analysis_schema import CATEGORIZED_SCHEMA
+from bigquery.schemes.schema_helpers import to_arrow_schema
+from crunchbase.normalizer import cast_to_schema
+from company_keywords.fingerprint_store import FingerprintStore
+from company_keywords.matcher import StrategyMatcher, count_by_strategy
+from helpers.artifacts import ArtifactWriter, iter_artifact, read_artifact, write_artifact
 from logger import Logger as logger
 from tasks.mapping import generate_germany_map
 
-def categorize_company(row):
-    description = row['Short_Description'].lower()
-    matched_codes = []
-    matched_names = []
-
-    # Check for all matching RE strategies (both code and name)
-    for key, strategy in Keywords.re_strategies.items():
-        # Check if the strategy name exists in the company description
-        if strategy['name'].lower() in description:
-            matched_codes.append(key)  # Append the strategy code like 'R0', 'R1'
-            matched_names.append(strategy['name'])  # Append the strategy name like 'Refuse', 'Rethink'
-
-    # If one or more matches are found, return them
-    if matched_codes and matched_names:
-        return pd.Series([row['Name'], row['Short_Description'], ', '.join(matched_codes), ', '.join(matched_names), len(matched_codes)])
+CATEGORIZED_TABLE = "Crunchbasecategorized"
+CATEGORIZED_ARTIFACT = "categorized_crunchbase_with_address"
+
+# the columns read from the crunchbase artifact and written for the categorized companies
+INPUT_COLUMNS = ['UUID', 'Name', 'Short_Description', 'City', 'Region', 'Country']
+OUTPUT_FIELDS = [field for field in CATEGORIZED_SCHEMA if field.name != 'dwh_partitiondate']
+
+def categorize(df: pd.DataFrame, matcher: StrategyMatcher = None, store: FingerprintStore = None,
+               workers: int = 1, chunk_rows: int = 20000) -> pd.DataFrame:
+    """
+    Match the RE strategies of all short descriptions in one pass per description.
+
+    Args:
+        df (pd.DataFrame): The companies with Name and Short_Description, and UUID if a store is used.
+        matcher (StrategyMatcher, optional): The compiled strategies. Defaults to the Keywords strategies.
+        store (FingerprintStore, optional): Reuse the results of unchanged companies. Defaults to None.
+        workers (int, optional): The number of processes matching the descriptions. Defaults to 1.
+        chunk_rows (int, optional): The descriptions per chunk sent to a process. Defaults to 20000.
+
+    Returns:
+        pd.DataFrame: Company_Name, Short_Description, RE_Strategy_Codes, RE_Strategy_Names,
+        RE_Strategy_Mask and Category_Count, 'Uncategorized' and 0 for companies without a strategy.
+    """
+    matcher = matcher or StrategyMatcher()
+    if store is not None:
+        masks = store.masks(df['UUID'], df['Short_Description'], matcher, workers, chunk_rows)
     else:
-        # Return 'Uncategorized' if no matches are found
-        return pd.Series([row['Name'], row['Short_Description'], 'Uncategorized', 'Uncategorized', 0])
+        masks = matcher.masks(df['Short_Description'], workers, chunk_rows)
+    return strategy_columns(df, masks, matcher)
+
+def strategy_columns(df: pd.DataFrame, masks, matcher: StrategyMatcher) -> pd.DataFrame:
+    """
+    Build the categorization columns from the strategy bits of the companies.
+
+    Args:
+        df (pd.DataFrame): The companies with Name and Short_Description.
+        masks (Iterable): The strategy bits in the order of the companies.
+        matcher (StrategyMatcher): The compiled strategies.
+
+    Returns:
+        pd.DataFrame: The columns described in categorize.
+    """
+    masks = pd.Series(masks, index=df.index, dtype="Int64")
+    # descriptions share few distinct masks, so every mask is decoded once
+    codes, names, counts = {}, {}, {}
+    for mask in masks.unique():
+        mask_codes, mask_names = matcher.decode(mask)
+        codes[mask] = ', '.join(mask_codes) if mask_codes else 'Uncategorized'
+        names[mask] = ', '.join(mask_names) if mask_names else 'Uncategorized'
+        counts[mask] = len(mask_codes)
+    return pd.DataFrame({
+        'Company_Name': df['Name'],
+        'Short_Description': df['Short_Description'],
+        'RE_Strategy_Codes': masks.map(codes).astype(object),
+        'RE_Strategy_Names': masks.map(names).astype(object),
+        'RE_Strategy_Mask': masks,
+        'Category_Count': masks.map(counts).astype(int),
+    }, index=df.index)
+
+def upload_categorized(bqclient: BigQueryClient, df: pd.DataFrame, partition_date: datetime, jobs: JobManager):
+    """
+    Submit the load of categorized companies, split only by the load chunk size of the client.
+
+    Args:
+        bqclient (BigQueryClient): The BigQueryClient object.
+        df (pd.DataFrame): The categorized companies.
+        partition_date (datetime): The dwh_partitiondate of the run.
+        jobs (JobManager): The manager tracking the load jobs.
+    """
+    if df.empty:
+        return
+    if not bqclient.table_exists(CATEGORIZED_TABLE):
+        bqclient.create_table(CATEGORIZED_TABLE, CATEGORIZED_SCHEMA)
+    df = cast_to_schema(df.assign(dwh_partitiondate=partition_date), CATEGORIZED_SCHEMA)
+    if not bqclient.load_dataframe_in_chunks(df, CATEGORIZED_TABLE, CATEGORIZED_CONFIG, CATEGORIZED_SCHEMA, jobs):
+        logger.error(f"Could not upload {len(df)} rows to {CATEGORIZED_TABLE}")
 
-def run_job():
-    # Define the path to crunchbase.csv relative to the current script location
-    csv_path = os.path.join(os.path.dirname(__file__), "../reporting/crunchbase.csv")
+def run_job(bqclient: BigQueryClient = None, upload=False, use_cache=True, workers=1, chunk_rows=20000,
+            stream=False, stream_rows=100000):
+    if stream:
+        run_streaming(bqclient, upload, use_cache, workers, chunk_rows, stream_rows)
+        return
 
-    # Fetch data from Crunchbase
+    # Fetch data from Crunchbase, only the columns needed for the categorization
     logger.log("Fetching data from reporting")
-    df = pd.read_csv(csv_path)
+    df = read_artifact("crunchbase", columns=INPUT_COLUMNS)
 
-    # Apply categorization and capture number of categories
+    # Apply categorization and capture number of categories, unchanged companies are taken from the fingerprint store
     logger.log("Categorizing companies based on their short descriptions")
-    df[['Company_Name', 'Short_Description', 'RE_Strategy_Codes', 'RE_Strategy_Names', 'Category_Count']] = df.apply(categorize_company, axis=1)
+    store = FingerprintStore() if use_cache else None
+    df[['Company_Name', 'Short_Description', 'RE_Strategy_Codes', 'RE_Strategy_Names', 'RE_Strategy_Mask', 'Category_Count']] = categorize(df, store=store, workers=workers, chunk_rows=chunk_rows)
 
     # Count how many entries have more than 1 RE strategy
     multiple_re_count = df[df['Category_Count'] > 1].shape[0]
     logger.log(f"Number of entries with more than one RE strategy: {multiple_re_count}")
+    logger.log(f"Number of entries per RE strategy: {count_by_strategy(df['RE_Strategy_Mask']).to_dict()}")
 
     # Filter out rows where categories are 'Uncategorized'
-    df_filtered = df[df['RE_Strategy_Codes'] != 'Uncategorized']
+    df_filtered = df[df['RE_Strategy_Mask'] != 0]
 
-    # Select the necessary columns including address (City, Region, Country)
-    df_filtered = df_filtered[['Company_Name', 'Short_Description', 'RE_Strategy_Codes', 'RE_Strategy_Names', 'City', 'Region', 'Country']]
+    # Select the necessary columns including address (City, Region, Country), later stages use the mask
+    df_filtered = cast_to_schema(df_filtered, OUTPUT_FIELDS)
 
-    # Save categorized data as CSV
-    logger.log("Saving categorized data as csv with address details")
-    output_csv = "reporting/categorized_crunchbase_with_address.csv"
-    df_filtered.to_csv(output_csv, index=False)
+    # Save categorized data
+    logger.log("Saving categorized data with address details")
+    write_artifact(df_filtered, CATEGORIZED_ARTIFACT)
+
+    if upload:
+        logger.log("Uploading categorized data to BigQuery")
+        jobs = JobManager()
+        upload_categorized(bqclient, df_filtered, datetime.now(), jobs)
+        if jobs.jobs:
+            jobs.wait()
 
     # Clean up memory
     del df
@@ -56,3 +132,66 @@ def run_job():
 
     # Log that the job is complete
     logger.log("Analysis job complete.")
+
+def run_streaming(bqclient: BigQueryClient = None, upload=False, use_cache=True, workers=1, chunk_rows=20000,
+                  stream_rows=100000):
+    """
+    Categorize the companies chunk by chunk, appending the categorized ones to the artifact.
+
+    The peak memory is set by stream_rows instead of the number of companies. Only the
+    counts per strategy are kept across chunks, and the fingerprint store index if it is used.
+
+    Args:
+        bqclient (BigQueryClient, optional): The BigQueryClient object. Defaults to None.
+        upload (bool, optional): Upload the categorized companies to BigQuery, one load per chunk. Defaults to False.
+        use_cache (bool, optional): Reuse the results of unchanged companies. Defaults to True.
+        workers (int, optional): The number of processes matching the descriptions. Defaults to 1.
+        chunk_rows (int, optional): The descriptions per chunk sent to a process. Defaults to 20000.
+        stream_rows (int, optional): The companies read per chunk. Defaults to 100000.
+    """
+    logger.log(f"Categorizing companies from reporting in chunks of {stream_rows} rows")
+    matcher = StrategyMatcher()
+    matcher.start_workers(workers)
+    store = FingerprintStore() if use_cache else None
+    jobs = JobManager()
+    partition_date = datetime.now()
+    total_count = 0
+    multiple_re_count = 0
+    strategy_counts = pd.Series(0, index=matcher.codes)
+    failed = True
+    try:
+        if store is not None:
+            store.open()
+        # a fixed schema, a chunk without categorized companies would otherwise type its columns as null
+        with ArtifactWriter(CATEGORIZED_ARTIFACT, to_arrow_schema(OUTPUT_FIELDS)) as writer:
+            for df in iter_artifact("crunchbase", columns=INPUT_COLUMNS, chunk_rows=stream_rows):
+                if store is not None:
+                    masks = store.match(df['UUID'], df['Short_Description'], matcher, workers, chunk_rows)
+                else:
+                    masks = matcher.masks(df['Short_Description'], workers, chunk_rows)
+                categorized = strategy_columns(df, masks, matcher)
+                total_count += len(df)
+                multiple_re_count += int((categorized['Category_Count'] > 1).sum())
+                strategy_counts += count_by_strategy(categorized['RE_Strategy_Mask'], matcher.strategies)
+
+                df_filtered = df[['City', 'Region', 'Country']].join(categorized)
+                df_filtered = cast_to_schema(df_filtered[df_filtered['RE_Strategy_Mask'] != 0], OUTPUT_FIELDS)
+                writer.write(df_filtered)
+                if upload:
+                    upload_categorized(bqclient, df_filtered, partition_date, jobs)
+                    # report failed loads while the stream is still running
+                    if jobs.collect():
+                        logger.error(f"Loads to {CATEGORIZED_TABLE} failed")
+                logger.debug(f"{total_count} companies categorized")
+        failed = False
+    finally:
+        matcher.close()
+        if store is not None:
+            store.close(discard=failed)
+        if jobs.jobs:
+            jobs.wait()
+
+    logger.log(f"Number of entries with more than one RE strategy: {multiple_re_count}")
+    logger.log(f"Number of entries per RE strategy: {strategy_counts.to_dict()}")
+    logger.log(f"Saved {writer.rows} of {total_count} companies with address details")
+    logger.log("Analysis job complete.")
@@ -1,130 +1,541 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import json
+import ast
+import copy
+import queue
+import threading
 import pandas as pd
 from bigquery.client import BigQueryClient
 from bigquery.job_config import CRUNCHBASE_CONFIG
-from bigquery.schemes.crunchbase_schema import CRUNCHBASE_SCHEMA
+from bigquery.job_manager import JobManager
+from bigquery.schemes.crunchbase_schema import CRUNCHBASE_CLUSTERING, CRUNCHBASE_SCHEMA
 
+from crunchbase.checkpoint import CrawlCheckpoint, query_key
 from crunchbase.client import CrunchbaseClient
 from crunchbase.crunchbase_query import CRUNCHBASE_QUERY
+from crunchbase.normalizer import cast_to_schema, project_entities
 from logger import Logger as logger
+from helpers.artifacts import ArtifactWriter, artifact_exists, read_artifact, write_artifact
+from helpers.cache import load_cache, save_cache
 from helpers.decorators import calc_time
+from helpers.snapshots import snapshot_artifact
 from config import Config
-from crunchbase.crunchbase_column_rename import COLUMN_NAME_MAPPING
 from tqdm import tqdm
 
-def run_job(client: CrunchbaseClient, bqclient: BigQueryClient, upload=False):
+WATERMARK_CACHE = "crunchbase_watermarks.json"
+# one row per company, kept up to date by --upsert_flag
+COMPANIES_TABLE = "Crunchbasecompanies"
+SNAPSHOT_ARTIFACT = "crunchbase"
+
+
+def run_job(client: CrunchbaseClient, bqclient: BigQueryClient, upload=False, workers=1, delta=False, checkpoint_dir=None,
+            pipeline=False, chunk_rows=50000, upsert=False, location_uuids=None, checkpoint_max_age_hours=None):
     
     # get data from Crunchbase
     logger.log("Fetching data from Crunchbase")
-    df = get_data(client)
-    logger.debug("Saving data as csv")
-    df.to_csv(f"reporting/crunchbase.csv", index=False)
+    if pipeline and delta:
+        logger.warning("The pipeline is not available in delta mode, downloading before uploading")
+    elif pipeline:
+        if workers > 1:
+            logger.warning(f"The pipeline crawls one query, {workers} crawl workers are ignored")
+        run_pipelined(client, bqclient, upload, CRUNCHBASE_QUERY, checkpoint_dir, chunk_rows, upsert=upsert,
+                      checkpoint_max_age_hours=checkpoint_max_age_hours)
+        return
+    query = CRUNCHBASE_QUERY
+    watermark = None
+    if delta:
+        watermarks = load_cache(WATERMARK_CACHE)
+        watermark = watermarks.get(query_key(query))
+        if watermark and artifact_exists(SNAPSHOT_ARTIFACT):
+            logger.info(f"Delta mode: fetching organizations updated since {watermark}")
+            query = add_predicate(query, {
+                "type": "predicate", "field_id": "updated_at", "operator_id": "gte", "values": [watermark]
+            })
+        else:
+            logger.info("Delta mode: no watermark or snapshot found, fetching everything")
+            watermark = None
+
+    if workers > 1:
+        # sub-locations split the crawl by place instead of by founding year
+        partitions = location_partitions(query, location_uuids) if location_uuids else created_at_partitions(query)
+        df = get_data_partitioned(client, partitions, workers, checkpoint_dir, checkpoint_max_age_hours)
+    else:
+        df = get_data(client, query, checkpoint_dir, checkpoint_max_age_hours)
+    if df is None:
+        logger.error("Download failed, the next run resumes from the last checkpoint")
+        return
+
+    if delta:
+        new_watermark = df['Updated_Date'].dropna().max() if not df.empty else None
+        if watermark:
+            df = merge_snapshot(read_artifact(SNAPSHOT_ARTIFACT), df)
+    logger.debug("Saving data as artifact")
+    write_artifact(df, SNAPSHOT_ARTIFACT)
+    # keep the snapshot of every run date in reporting/snapshots
+    snapshot_artifact(SNAPSHOT_ARTIFACT)
+    # only move the watermark forward once the merged snapshot is stored
+    if delta and isinstance(new_watermark, str):
+        watermarks[query_key(CRUNCHBASE_QUERY)] = new_watermark
+        save_cache(watermarks, WATERMARK_CACHE)
     
     # write data to BigQuery
     if upload:
         logger.log("Uploading data to BigQuery")
-        upload_df(bqclient, df)
+        if upsert:
+            upsert_df(bqclient, df)
+        else:
+            upload_df(bqclient, df)
 
     # delete dataframes to free up memory
     del df
 
-def extract_location_data(row):
+
+def merge_snapshot(previous: pd.DataFrame, changes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge changed organizations into the previous snapshot by UUID.
+
+    Changed rows replace their previous version and new rows are appended.
+    Organizations deleted in Crunchbase stay in the snapshot.
+
+    Args:
+        previous (pd.DataFrame): The previous snapshot.
+        changes (pd.DataFrame): The organizations updated since the last run.
+
+    Returns:
+        pd.DataFrame: The merged snapshot.
+    """
+    merged = pd.concat([previous, changes], ignore_index=True)
+    merged = merged.drop_duplicates(subset='UUID', keep='last').reset_index(drop=True)
+    merged = cast_to_schema(merged, CRUNCHBASE_SCHEMA)
+    merged['dwh_partitiondate'] = changes['dwh_partitiondate'].iloc[0] if not changes.empty else datetime.now()
+    logger.info(f"Merged {len(changes)} changed organizations into a snapshot of {len(merged)}")
+    return merged
+
+LOCATION_COLUMNS = {
+    "city": "City",
+    "region": "Region",
+    "country": "Country",
+    "continent": "Continent"
+}
+
+
+def extract_locations(locations: pd.Series) -> pd.DataFrame:
+    """
+    Split the location identifiers into City, Region, Country and Continent columns.
+
+    The location lists are exploded once and their location_type is pivoted into
+    columns in a single pass. Values read back from a CSV are parsed as Python
+    literals, so names containing apostrophes survive.
+
+    Args:
+        locations (pd.Series): The location identifier lists as returned by the API.
+
+    Returns:
+        pd.DataFrame: The location columns with the index of the input.
+    """
     try:
-        if isinstance(row, list):
-            location_data = row
-        else:
-            location_data = json.loads(row.replace("'", "\""))
-        city = next((item['value'] for item in location_data if item["location_type"] == "city"), None)
-        region = next((item['value'] for item in location_data if item["location_type"] == "region"), None)
-        country = next((item['value'] for item in location_data if item["location_type"] == "country"), None)
-        continent = next((item['value'] for item in location_data if item["location_type"] == "continent"), None)
-        return pd.Series([city, region, country, continent], index=['City', 'Region', 'Country', 'Continent'])
+        if (locations.map(type) == str).any():
+            locations = pd.Series(
+                [ast.literal_eval(value) if isinstance(value, str) else value for value in locations],
+                index=locations.index
+            )
+        exploded = locations.explode().dropna()
+        items = pd.DataFrame(exploded.tolist(), index=exploded.index, columns=['location_type', 'value'])
+        items.index.name = 'row'
+        items = items.reset_index().drop_duplicates(subset=['row', 'location_type'])
+        table = items.pivot(index='row', columns='location_type', values='value')
     except Exception as e:
         logger.error(f"Error in extracting location data: {e}")
-        return pd.Series([None, None, None, None], index=['City', 'Region', 'Country', 'Continent'])
+        table = pd.DataFrame()
+    table = table.reindex(index=locations.index, columns=list(LOCATION_COLUMNS))
+    return table.rename(columns=LOCATION_COLUMNS).rename_axis(index=None, columns=None)
+
+
+def iter_pages(client: CrunchbaseClient, query: dict, limit: int = 1000, checkpoint: CrawlCheckpoint = None):
+    """
+    Iterate over the result pages of a Crunchbase search using after_id pagination.
+
+    Every page is yielded as soon as it arrives, so callers can process or
+    persist it without holding the whole crawl in memory. With a checkpoint the
+    stored pages are replayed first and the crawl continues behind the stored
+    cursor; every new page is stored before it is yielded.
+
+    Args:
+        client (CrunchbaseClient): The CrunchbaseClient object.
+        query (dict): The query (only columns, order_by and filters).
+        limit (int, optional): The page size. Defaults to 1000.
+        checkpoint (CrawlCheckpoint, optional): The checkpoint to resume from and write to. Defaults to None.
+
+    Yields:
+        list: The entities of one page.
+    """
+    after_id = None
+    if checkpoint:
+        yield from checkpoint.pages()
+        if checkpoint.state["done"]:
+            return
+        after_id = checkpoint.state["after_id"]
+    while True:
+        response = client.get_data(query, after_id=after_id, limit=limit)
+        entities = response.get('entities', [])
+        done = len(entities) < limit
+        if checkpoint:
+            checkpoint.save_page(entities, done)
+        if not entities:
+            return
+        yield entities
+        if done:
+            return
+        after_id = entities[-1]['uuid']
 
 
 @calc_time
-def get_data(client: CrunchbaseClient) -> pd.DataFrame:
+def get_data(client: CrunchbaseClient, query: dict = CRUNCHBASE_QUERY, checkpoint_dir: str = None,
+             checkpoint_max_age_hours: float = None) -> pd.DataFrame:
     """
-    Get data from CrunchbaseClient with pagination using after_id and save it to a CSV file.
+    Get data from CrunchbaseClient with pagination using after_id.
+
+    The pages are collected in a list and concatenated once at the end instead
+    of growing one DataFrame page by page.
 
     Args:
         client (CrunchbaseClient): The CrunchbaseClient object.
+        query (dict, optional): The query. Defaults to CRUNCHBASE_QUERY.
+        checkpoint_dir (str, optional): Folder for crawl checkpoints, None disables them. Defaults to None.
+        checkpoint_max_age_hours (float, optional): Older checkpoints are discarded. Defaults to CrawlCheckpoint.max_age_hours.
 
     Returns:
         pd.DataFrame: The extracted data as a pandas DataFrame.
     """
-    raw = pd.DataFrame()
-    query = CRUNCHBASE_QUERY  
-
     try:
+        checkpoint = CrawlCheckpoint(query, checkpoint_dir, checkpoint_max_age_hours) if checkpoint_dir else None
         comp_count = client.company_count(query)
         logger.info(f"The number of companies found: {comp_count}")
-        data_acq = 0
+        pages = []
         with tqdm(total=comp_count) as pbar: 
-            while data_acq < comp_count:
-                if data_acq != 0:
-                    last_uuid = raw.uuid.iloc[-1]
-                    response = client.get_data(query, after_id=last_uuid)
-                    normalized_raw = pd.json_normalize(response['entities'])
-                    raw = pd.concat([raw, normalized_raw], ignore_index=True)
-                    data_acq = len(raw.uuid)
-                else:
-                    response = client.get_data(query)
-                    normalized_raw = pd.json_normalize(response['entities'])
-                    raw = pd.concat([raw, normalized_raw], ignore_index=True)
-                    data_acq = len(raw.uuid)
-                pbar.update(len(normalized_raw))
-        # Rename columns based on the mapping
-        raw.rename(columns=COLUMN_NAME_MAPPING, inplace=True)
-
-        # Split properties.location_identifiers into multiple columns
-        raw[['City', 'Region', 'Country', 'Continent']] = raw['Location_Identifiers'].apply(extract_location_data)
-
-        # Drop the original Location_Identifiers column
-        #raw.drop(columns=['Location_Identifiers'], inplace=True)
-
-        # Add a column for partition date
-        raw['dwh_partitiondate'] = datetime.now()
+            for entities in iter_pages(client, query, checkpoint=checkpoint):
+                pages.append(project_page(entities))
+                pbar.update(len(entities))
+        raw = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+        del pages
+        raw = prepare_frame(raw)
+        if checkpoint:
+            checkpoint.clear()
+        return raw
+    except Exception as e:
+        logger.error(f"Error in getting data from Crunchbase: {e}")
+
+
+def prepare_frame(raw: pd.DataFrame, partition_date: datetime = None) -> pd.DataFrame:
+    """
+    Add the derived columns to the projected entities and cast them to CRUNCHBASE_SCHEMA.
+
+    Args:
+        raw (pd.DataFrame): The projected entities including Location_Identifiers.
+        partition_date (datetime, optional): The dwh_partitiondate of the run. Defaults to now.
+
+    Returns:
+        pd.DataFrame: The prepared data.
+    """
+    locations = raw.pop('Location_Identifiers') if 'Location_Identifiers' in raw else pd.Series(dtype=object)
+
+    # Split location_identifiers into multiple columns
+    raw[list(LOCATION_COLUMNS.values())] = extract_locations(locations)
+
+    # Add a column for partition date
+    raw['dwh_partitiondate'] = partition_date or datetime.now()
+
+    return cast_to_schema(raw, CRUNCHBASE_SCHEMA)
+
+
+def project_page(entities: list) -> pd.DataFrame:
+    """
+    Project one page of entities onto CRUNCHBASE_SCHEMA.
+
+    Args:
+        entities (list): The entities of the page.
+
+    Returns:
+        pd.DataFrame: The projected page including Location_Identifiers.
+    """
+    return project_entities(entities, CRUNCHBASE_SCHEMA, extra_columns=['Location_Identifiers'])
+
+
+def add_predicate(query: dict, predicate: dict) -> dict:
+    """
+    Return a copy of the query with an additional predicate.
+
+    Args:
+        query (dict): The query.
+        predicate (dict): The predicate to add.
+
+    Returns:
+        dict: The extended query.
+    """
+    extended = copy.deepcopy(query)
+    extended.setdefault("query", []).append(predicate)
+    return extended
+
+
+def created_at_partitions(query: dict, start_year: int = 2008, end_year: int = None) -> list:
+    """
+    Split a query into disjoint yearly created_at windows.
+
+    The first window catches everything before start_year and the last one
+    everything from end_year on, so together they cover the whole query.
+
+    Args:
+        query (dict): The query to split.
+        start_year (int, optional): The first yearly boundary. Defaults to 2008.
+        end_year (int, optional): The last yearly boundary. Defaults to the current year.
+
+    Returns:
+        list: The partition queries.
+    """
+    end_year = end_year or datetime.now().year
+    boundaries = [f"{year}-01-01" for year in range(start_year, end_year + 1)]
+    partitions = [add_predicate(query, {
+        "type": "predicate", "field_id": "created_at", "operator_id": "lt", "values": [boundaries[0]]
+    })]
+    for lower, upper in zip(boundaries, boundaries[1:]):
+        partition = add_predicate(query, {
+            "type": "predicate", "field_id": "created_at", "operator_id": "gte", "values": [lower]
+        })
+        partitions.append(add_predicate(partition, {
+            "type": "predicate", "field_id": "created_at", "operator_id": "lt", "values": [upper]
+        }))
+    partitions.append(add_predicate(query, {
+        "type": "predicate", "field_id": "created_at", "operator_id": "gte", "values": [boundaries[-1]]
+    }))
+    return partitions
+
+
+def location_partitions(query: dict, location_uuids: list) -> list:
+    """
+    Split a query into one query per sub-location.
+
+    The location filter of the query is replaced, so the sub-locations have to
+    cover it, e.g. all regions of the queried country. A company listed in two
+    sub-locations is only kept once by get_data_partitioned.
+
+    Args:
+        query (dict): The query to split.
+        location_uuids (list): The Crunchbase location UUIDs, e.g. the regions of a country.
+
+    Returns:
+        list: The partition queries.
+    """
+    partitions = []
+    for location_uuid in location_uuids:
+        partition = copy.deepcopy(query)
+        partition["query"] = [p for p in partition.get("query", []) if p.get("field_id") != "location_identifiers"]
+        partition["query"].append({
+            "type": "predicate", "field_id": "location_identifiers", "operator_id": "includes", "values": [location_uuid]
+        })
+        partitions.append(partition)
+    return partitions
+
+
+@calc_time
+def get_data_partitioned(client: CrunchbaseClient, partitions: list, workers: int = 4, checkpoint_dir: str = None,
+                         checkpoint_max_age_hours: float = None) -> pd.DataFrame:
+    """
+    Get data for several disjoint partitions of a query concurrently.
+
+    Every partition is paged on its own with after_id. The number of requests in
+    flight stays bounded by the client, so more workers than allowed requests only
+    queue up instead of provoking CS15x errors. The partitions are merged in their
+    given order and duplicate UUIDs are dropped, so the result is deterministic.
+
+    The rate limit caps the speedup: a serial crawl already reaches 200 requests per
+    minute at about 0.3 seconds per page, so only slower responses gain. Every
+    partition also ends with a partly filled page. Against the local stand-in with
+    30,000 companies in 20 yearly partitions, 4 workers needed 41 instead of 31
+    requests and were 2.5 times faster at 1 second latency, but no faster at 0.2 seconds.
+
+    Args:
+        client (CrunchbaseClient): The CrunchbaseClient object.
+        partitions (list): The partition queries.
+        workers (int, optional): The number of partitions fetched at the same time. Defaults to 4.
+        checkpoint_dir (str, optional): Folder for crawl checkpoints, None disables them. Defaults to None.
+        checkpoint_max_age_hours (float, optional): Older checkpoints are discarded. Defaults to CrawlCheckpoint.max_age_hours.
+
+    Returns:
+        pd.DataFrame: The extracted data as a pandas DataFrame.
+    """
+    try:
+        logger.info(f"Crawling {len(partitions)} partitions with {workers} workers")
+        checkpoints = [CrawlCheckpoint(query, checkpoint_dir, checkpoint_max_age_hours) if checkpoint_dir else None for query in partitions]
+        with tqdm() as pbar:
+            def fetch_partition(query, checkpoint):
+                pages = []
+                for entities in iter_pages(client, query, checkpoint=checkpoint):
+                    pages.append(project_page(entities))
+                    pbar.update(len(entities))
+                return pd.concat(pages, ignore_index=True) if pages else None
 
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                frames = [frame for frame in executor.map(fetch_partition, partitions, checkpoints) if frame is not None]
 
+        raw = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['UUID'])
+        del frames
+        raw = raw.drop_duplicates(subset='UUID', keep='first').reset_index(drop=True)
+        logger.info(f"The number of companies found: {len(raw)}")
+        raw = prepare_frame(raw)
+        for checkpoint in checkpoints:
+            if checkpoint:
+                checkpoint.clear()
         return raw
     except Exception as e:
         logger.error(f"Error in getting data from Crunchbase: {e}")
 
+@calc_time
+def run_pipelined(client: CrunchbaseClient, bqclient: BigQueryClient, upload=False, query: dict = CRUNCHBASE_QUERY,
+                  checkpoint_dir: str = None, chunk_rows: int = 50000, queue_size: int = 8, upsert=False,
+                  checkpoint_max_age_hours: float = None):
+    """
+    Download and upload at the same time.
+
+    A background thread fetches the pages into a bounded queue while this thread
+    appends them to the artifact and loads every chunk of chunk_rows rows into
+    BigQuery. If the download fails, the artifact keeps its previous version and
+    the checkpoint keeps the partition date of the run. The resumed run deletes
+    the chunks loaded under that date before it loads the replayed pages again,
+    so the table never holds a run twice. Upserts need no cleanup.
+
+    Args:
+        client (CrunchbaseClient): The CrunchbaseClient object.
+        bqclient (BigQueryClient): The BigQueryClient object.
+        upload (bool, optional): Load the chunks into BigQuery. Defaults to False.
+        query (dict, optional): The query. Defaults to CRUNCHBASE_QUERY.
+        checkpoint_dir (str, optional): Folder for crawl checkpoints, None disables them. Defaults to None.
+        checkpoint_max_age_hours (float, optional): Older checkpoints are discarded. Defaults to CrawlCheckpoint.max_age_hours.
+        chunk_rows (int, optional): Rows per BigQuery load job. Defaults to 50000.
+        queue_size (int, optional): Pages buffered between download and upload. Defaults to 8.
+        upsert (bool, optional): Merge the chunks into the companies table instead of appending them. Defaults to False.
+    """
+    partition_date = datetime.now()
+    checkpoint = CrawlCheckpoint(query, checkpoint_dir, checkpoint_max_age_hours) if checkpoint_dir else None
+    resumed = False
+    if checkpoint:
+        if checkpoint.state["pages"] and checkpoint.state.get("partition_date"):
+            # a resumed run continues the partition of the failed run
+            partition_date = datetime.fromisoformat(checkpoint.state["partition_date"])
+            resumed = True
+        else:
+            # stored together with the first page
+            checkpoint.state["partition_date"] = partition_date.isoformat()
+    pages = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def produce():
+        try:
+            for entities in iter_pages(client, query, checkpoint=checkpoint):
+                if stop.is_set():
+                    return
+                pages.put(prepare_frame(project_page(entities), partition_date))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            pages.put(None)
+
+    tablename = "Crunchbasedownload"
+    if upload and not upsert:
+        if not bqclient.table_exists(tablename):
+            bqclient.create_table(tablename, CRUNCHBASE_SCHEMA, clustering_fields=CRUNCHBASE_CLUSTERING)
+        elif resumed:
+            # the replayed pages are loaded again, so the chunks of the failed run are removed first
+            bqclient.delete_partition(tablename, partition_date)
+
+    # chunk loads run in BigQuery while the next pages are downloaded
+    jobs = JobManager()
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        with ArtifactWriter(SNAPSHOT_ARTIFACT) as writer, tqdm() as pbar:
+            chunk = []
+            chunk_size = 0
+            while True:
+                frame = pages.get()
+                if frame is not None:
+                    writer.write(frame)
+                    pbar.update(len(frame))
+                    chunk.append(frame)
+                    chunk_size += len(frame)
+                if chunk and (frame is None or chunk_size >= chunk_rows):
+                    if upload and upsert:
+                        upsert_df(bqclient, pd.concat(chunk, ignore_index=True))
+                    elif upload:
+                        load_dataframe(bqclient, pd.concat(chunk, ignore_index=True), tablename, jobs)
+                    chunk = []
+                    chunk_size = 0
+                if frame is None:
+                    break
+            if errors:
+                raise errors[0]
+        logger.info(f"The number of companies found: {writer.rows}")
+        snapshot_artifact(SNAPSHOT_ARTIFACT)
+        if checkpoint:
+            checkpoint.clear()
+    except Exception as e:
+        logger.error(f"Error in pipelined download: {e}")
+    finally:
+        # let the producer finish if the upload side stopped early
+        stop.set()
+        while producer.is_alive():
+            try:
+                pages.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        if jobs.jobs:
+            jobs.wait()
+
+
 @calc_time
 def upload_df(client: BigQueryClient, dataframe: pd.DataFrame):
     try:
         tablename = "Crunchbasedownload"
         table_id = client.dataset_refstring + "." + tablename
         if not client.table_exists(tablename):
-            client.create_table(tablename, CRUNCHBASE_SCHEMA)
-            upload_job = client.load_table_from_dataframe(dataframe, tablename, CRUNCHBASE_CONFIG)
-            try:
-                upload_job.result()
-            except Exception as e:
-                handle_upload_error(e, upload_job)
-            logger.info("Upload complete")            
+            client.create_table(tablename, CRUNCHBASE_SCHEMA, clustering_fields=CRUNCHBASE_CLUSTERING)
+            load_dataframe(client, dataframe, tablename)
         else:
             if client.check_is_no_duplicate(table_id, dataframe):
-                upload_job = client.load_table_from_dataframe(dataframe, tablename, CRUNCHBASE_CONFIG)
-                try:
-                    upload_job.result()
-                except Exception as e:
-                    handle_upload_error(e, upload_job)
-                logger.info("Upload complete")
+                load_dataframe(client, dataframe, tablename)
             else:
                 logger.info("No upload necessary")
     except Exception as e:
         logger.error(f"Error: {e}")
 
 
+def upsert_df(client: BigQueryClient, dataframe: pd.DataFrame):
+    """
+    Merge the companies into the companies table, only new or changed companies are written.
 
-def handle_upload_error(error, job):
-    logger.error(f"Error while waiting for job result: {error}")
-    job_errors = getattr(job, 'errors', None)
-    
-    if job_errors:
-        logger.error(f"Job errors: {job_errors}")
+    Args:
+        client (BigQueryClient): The BigQueryClient object.
+        dataframe (pd.DataFrame): The data.
+    """
+    try:
+        if not client.upsert_dataframe(dataframe, COMPANIES_TABLE, CRUNCHBASE_CONFIG, CRUNCHBASE_SCHEMA,
+                                       clustering_fields=CRUNCHBASE_CLUSTERING):
+            logger.error(f"Upsert of {len(dataframe)} rows into {COMPANIES_TABLE} failed")
+    except Exception as e:
+        logger.error(f"Error: {e}")
+
+
+def load_dataframe(client: BigQueryClient, dataframe: pd.DataFrame, tablename: str, job_manager: JobManager = None):
+    """
+    Load a dataframe into a BigQuery table as typed Parquet chunks.
+
+    Args:
+        client (BigQueryClient): The BigQueryClient object.
+        dataframe (pd.DataFrame): The data.
+        tablename (str): The name of the table.
+        job_manager (JobManager, optional): Track the jobs there instead of waiting for them. Defaults to None.
+    """
+    if client.load_dataframe_in_chunks(dataframe, tablename, CRUNCHBASE_CONFIG, CRUNCHBASE_SCHEMA, job_manager):
+        logger.info(f"Upload of {len(dataframe)} rows {'submitted' if job_manager else 'complete'}")
+    else:
+        logger.error(f"Upload of {len(dataframe)} rows into {tablename} failed")
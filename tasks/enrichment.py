@@ -0,0 +1,225 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import os
+import json
+import pandas as pd
+from bigquery.client import BigQueryClient
+from bigquery.job_config import CRUNCHBASE_CATEGORIES_CONFIG, CRUNCHBASE_FOUNDERS_CONFIG, CRUNCHBASE_FUNDING_ROUNDS_CONFIG
+from bigquery.job_manager import JobManager
+from bigquery.schemes.crunchbase_enrichment_schema import (
+    CRUNCHBASE_CATEGORIES_SCHEMA,
+    CRUNCHBASE_FOUNDERS_SCHEMA,
+    CRUNCHBASE_FUNDING_ROUNDS_SCHEMA,
+    ENRICHMENT_CLUSTERING
+)
+from crunchbase.client import CrunchbaseClient
+from crunchbase.normalizer import cast_to_schema
+from logger import Logger as logger
+from helpers.artifacts import read_artifact, write_artifact
+from helpers.atomic import atomic_write
+from helpers.cache import get_cache_path
+from helpers.decorators import calc_time
+from tqdm import tqdm
+
+CARD_IDS = ["founders", "raised_funding_rounds"]
+FIELD_IDS = ["categories"]
+CARD_CACHE = "crunchbase_cards"
+
+# artifact and BigQuery table of every normalized card
+ENRICHMENT_TABLES = {
+    "founders": ("crunchbase_founders", "Crunchbasefounders", CRUNCHBASE_FOUNDERS_SCHEMA, CRUNCHBASE_FOUNDERS_CONFIG),
+    "funding_rounds": ("crunchbase_funding_rounds", "Crunchbasefundingrounds", CRUNCHBASE_FUNDING_ROUNDS_SCHEMA, CRUNCHBASE_FUNDING_ROUNDS_CONFIG),
+    "categories": ("crunchbase_categories", "Crunchbasecategories", CRUNCHBASE_CATEGORIES_SCHEMA, CRUNCHBASE_CATEGORIES_CONFIG),
+}
+
+
+@calc_time
+def run_job(client: CrunchbaseClient, bqclient: BigQueryClient, upload=False, workers=4):
+    """
+    Fetch founders, funding rounds and categories of all organizations in the crunchbase artifact.
+
+    Args:
+        client (CrunchbaseClient): The CrunchbaseClient object.
+        bqclient (BigQueryClient): The BigQueryClient object.
+        upload (bool, optional): Upload the tables to BigQuery. Defaults to False.
+        workers (int, optional): The number of organizations fetched at the same time. Defaults to 4.
+    """
+    organizations = read_artifact("crunchbase", columns=['UUID', 'Updated_Date'])
+    entities = fetch_cards(client, organizations, workers)
+    tables = normalize_cards(entities)
+    for name, (artifact, _, _, _) in ENRICHMENT_TABLES.items():
+        logger.info(f"{len(tables[name])} {name} found")
+        write_artifact(tables[name], artifact)
+
+    if upload:
+        logger.log("Uploading enrichment to BigQuery")
+        upload_tables(bqclient, tables)
+
+
+def card_cache_dir() -> str:
+    """
+    Get the folder of the cached cards and create it if needed.
+
+    Returns:
+        str: The folder.
+    """
+    directory = get_cache_path(CARD_CACHE)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def load_card(directory: str, uuid: str, updated_at: str) -> dict:
+    """
+    Load a cached card response, if it is not older than the organization.
+
+    Args:
+        directory (str): The cache folder.
+        uuid (str): The UUID of the organization.
+        updated_at (str): The Updated_Date of the organization in the snapshot.
+
+    Returns:
+        dict: The response, None if it is not cached or outdated.
+    """
+    path = os.path.join(directory, f"{uuid}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        cached = json.load(f)
+    if cached.get("updated_at") != updated_at:
+        return None
+    return cached["entity"]
+
+
+def save_card(directory: str, uuid: str, updated_at: str, entity: dict):
+    """
+    Cache a card response together with the Updated_Date it belongs to.
+
+    Args:
+        directory (str): The cache folder.
+        uuid (str): The UUID of the organization.
+        updated_at (str): The Updated_Date of the organization in the snapshot.
+        entity (dict): The response.
+    """
+    path = os.path.join(directory, f"{uuid}.json")
+    with atomic_write(path) as tmp_path, open(tmp_path, 'w') as f:
+        json.dump({"updated_at": updated_at, "entity": entity}, f)
+
+
+def fetch_cards(client: CrunchbaseClient, organizations: pd.DataFrame, workers: int = 4) -> dict:
+    """
+    Fetch the cards of many organizations concurrently, reusing cached responses.
+
+    Only organizations that are new or were updated since their card was cached
+    are requested. The number of requests in flight stays bounded by the client.
+
+    Args:
+        client (CrunchbaseClient): The CrunchbaseClient object.
+        organizations (pd.DataFrame): The organizations with UUID and Updated_Date.
+        workers (int, optional): The number of organizations fetched at the same time. Defaults to 4.
+
+    Returns:
+        dict: The responses by UUID.
+    """
+    directory = card_cache_dir()
+    entities = {}
+    missing = []
+    for uuid, updated_at in zip(organizations['UUID'], organizations['Updated_Date']):
+        updated_at = None if pd.isna(updated_at) else str(updated_at)
+        entity = load_card(directory, uuid, updated_at)
+        if entity is None:
+            missing.append((uuid, updated_at))
+        else:
+            entities[uuid] = entity
+    logger.info(f"{len(entities)} cards cached, fetching {len(missing)} with {workers} workers")
+
+    def fetch(organization):
+        uuid, updated_at = organization
+        try:
+            entity = client.get_entity(uuid, card_ids=CARD_IDS, field_ids=FIELD_IDS)
+        except Exception as e:
+            logger.error(f"Could not fetch the cards of {uuid}: {e}")
+            return uuid, None
+        if entity is not None:
+            save_card(directory, uuid, updated_at, entity)
+        return uuid, entity
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, tqdm(total=len(missing)) as pbar:
+        for uuid, entity in executor.map(fetch, missing):
+            pbar.update(1)
+            if entity is not None:
+                entities[uuid] = entity
+    return entities
+
+
+def normalize_cards(entities: dict, partition_date: datetime = None) -> dict:
+    """
+    Flatten the card responses into one table per card, joined to the organizations by UUID.
+
+    Args:
+        entities (dict): The responses by UUID.
+        partition_date (datetime, optional): The dwh_partitiondate of the run. Defaults to now.
+
+    Returns:
+        dict: The founders, funding_rounds and categories dataframes.
+    """
+    founders, funding_rounds, categories = [], [], []
+    for uuid, entity in entities.items():
+        cards = entity.get("cards", {})
+        for founder in cards.get("founders", []):
+            identifier = founder.get("identifier", {})
+            founders.append({
+                "UUID": uuid,
+                "Founder_UUID": identifier.get("uuid"),
+                "Founder_Name": identifier.get("value"),
+                "Founder_Permalink": identifier.get("permalink"),
+            })
+        for funding_round in cards.get("raised_funding_rounds", []):
+            identifier = funding_round.get("identifier", {})
+            funding_rounds.append({
+                "UUID": uuid,
+                "Funding_Round_UUID": identifier.get("uuid"),
+                "Funding_Round_Name": identifier.get("value"),
+                "Announced_On": funding_round.get("announced_on"),
+                "Investment_Type": funding_round.get("investment_type"),
+                "Money_Raised_USD": (funding_round.get("money_raised") or {}).get("value_usd"),
+            })
+        for category in entity.get("properties", {}).get("categories", []):
+            categories.append({
+                "UUID": uuid,
+                "Category_UUID": category.get("uuid"),
+                "Category_Name": category.get("value"),
+                "Category_Permalink": category.get("permalink"),
+            })
+
+    partition_date = partition_date or datetime.now()
+    tables = {}
+    for name, rows in (("founders", founders), ("funding_rounds", funding_rounds), ("categories", categories)):
+        schema = ENRICHMENT_TABLES[name][2]
+        dataframe = pd.DataFrame(rows, columns=[field.name for field in schema if field.name != 'dwh_partitiondate'])
+        dataframe.insert(0, 'dwh_partitiondate', partition_date)
+        tables[name] = cast_to_schema(dataframe, schema)
+    return tables
+
+
+def upload_tables(client: BigQueryClient, tables: dict):
+    """
+    Load the enrichment tables into BigQuery at the same time.
+
+    Args:
+        client (BigQueryClient): The BigQueryClient object.
+        tables (dict): The founders, funding_rounds and categories dataframes.
+    """
+    try:
+        jobs = JobManager()
+        for name, (_, tablename, schema, job_config) in ENRICHMENT_TABLES.items():
+            dataframe = tables[name]
+            if not client.table_exists(tablename):
+                client.create_table(tablename, schema, clustering_fields=ENRICHMENT_CLUSTERING)
+            elif not client.check_is_no_duplicate(client.dataset_refstring + "." + tablename, dataframe):
+                logger.info(f"No upload of {tablename} necessary")
+                continue
+            client.load_dataframe_in_chunks(dataframe, tablename, job_config, schema, jobs)
+        if jobs.jobs:
+            jobs.wait()
+    except Exception as e:
+        logger.error(f"Error: {e}")
@@ -1,36 +1,53 @@
 import time
+import json
 import random
-import pandas as pd
 
+from bigquery.batch_uploader import BatchUploader
+from bigquery.client import BigQueryClient
+from bigquery.job_config import LINKEDIN_CONFIG
+from bigquery.schemes.linkedin_schema import LINKEDIN_SCHEMA
 from linkedin_request.client import LinkedinClient
 from logger import Logger as logger
+from helpers.artifacts import read_artifact, write_artifact
 
-# TODO: Upload to Bigquery
+LINKEDIN_TABLE = "Linkedincompanies"
 
-def run_job(linkedinclient: LinkedinClient):
+
+def run_job(linkedinclient: LinkedinClient, bqclient: BigQueryClient = None, upload=False, batch_rows=None, flush_seconds=None):
     
-    logger.log("Loading data from CSV")
-    df = pd.read_csv("reporting/crunchbase.csv")
- 
+    logger.log("Loading data from reporting")
+    df = read_artifact("crunchbase", columns=['UUID', 'Name'])
+
+    # scraped companies are uploaded while the scraping is still running
+    uploader = BatchUploader(bqclient, LINKEDIN_TABLE, LINKEDIN_SCHEMA, LINKEDIN_CONFIG,
+                             batch_rows, flush_seconds) if upload else None
+
     # Scrape LinkedIn company data for each company name in the DataFrame
     linkedin_data = []
-    for company_name in df['Name']:
-        logger.log(f"Scraping LinkedIn data for company: {company_name}")
-        # Make API call to LinkedIn
-        company_data = LinkedinClient.get_company_info(linkedinclient, company_name)
-        linkedin_data.append(company_data)
-        # Wait for 10-20 seconds before making the next API call
-        time.sleep(random.uniform(10, 20))
+    try:
+        for uuid, company_name in zip(df['UUID'], df['Name']):
+            logger.log(f"Scraping LinkedIn data for company: {company_name}")
+            # Make API call to LinkedIn
+            company_data = LinkedinClient.get_company_info(linkedinclient, company_name)
+            linkedin_data.append(company_data)
+            if uploader:
+                uploader.add({'UUID': uuid, 'Name': company_name,
+                              'linkedin_data': json.dumps(company_data, default=str) if company_data else None})
+            # Wait for 10-20 seconds before making the next API call
+            time.sleep(random.uniform(10, 20))
+    finally:
+        if uploader:
+            uploader.close()
 
-    # Add LinkedIn data to DataFrame
-    df['linkedin_data'] = linkedin_data
+    # Add LinkedIn data to DataFrame, stored as JSON text
+    df['linkedin_data'] = [json.dumps(data, default=str) if data else None for data in linkedin_data]
 
     # save dataframe as csv if DEV_MODE is True
     # if Config.DEV_MODE:
 
     #it will be always saved in reportings for the linkedin search
-    logger.debug("Saving data as csv")
-    df.to_csv(f"reporting/linkedin.csv", index=False)
+    logger.debug("Saving data as artifact")
+    write_artifact(df, "linkedin")
 
     # delete dataframes to free up memory
     del df
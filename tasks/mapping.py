@@ -1,12 +1,15 @@
 import geopandas as gpd
-import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib import cm
 import requests
 import time
-import os
-import json
 from logger import Logger as logger
+from company_keywords.matcher import explode_strategies
+from helpers.artifacts import read_artifact
+from helpers.cache import load_cache, save_cache
+from helpers.decorators import get_retry_after
+from helpers.rate_limit import get_bucket
+from helpers.transport import get_transport
 from collections import defaultdict
 from tqdm import tqdm
 
@@ -16,11 +19,22 @@ def get_osm_coordinates(city, country="Germany", cache=None, retries=5, backoff_
         logger.info(f"Using cached coordinates for {city}")
         return cache[city] 
     
-    url = f"https://nominatim.openstreetmap.org/search?q={city},{country}&format=json&limit=1"
+    url = "https://nominatim.openstreetmap.org/search"
+    params = {"q": f"{city},{country}", "format": "json", "limit": 1}
+    transport = get_transport()
+    # Nominatim allows at most one request per second
+    rate_limiter = get_bucket("nominatim", 1.0)
     
     for attempt in range(retries):
         logger.info(f"Attempting to get coordinates for {city} (Attempt {attempt + 1}/{retries})")
-        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
+        try:
+            rate_limiter.acquire()
+            response = transport.get(url, params=params, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request for coordinates of {city} failed: {e}. Retrying...")
+            time.sleep(backoff_factor)
+            backoff_factor *= 2
+            continue
         
         if response.status_code == 200 and response.json():
             data = response.json()[0]
@@ -28,8 +42,9 @@ def get_osm_coordinates(city, country="Germany", cache=None, retries=5, backoff_
             logger.info(f"Successfully retrieved coordinates for {city}: (lat: {lat}, lon: {lon})")
             return lat, lon
         elif response.status_code == 429:
-            logger.warning(f"Rate limit hit for {city}, waiting {backoff_factor} seconds before retrying...")
-            time.sleep(backoff_factor)
+            wait = get_retry_after(requests.HTTPError(response=response)) or backoff_factor
+            logger.warning(f"Rate limit hit for {city}, waiting {wait} seconds before retrying...")
+            time.sleep(wait)
             backoff_factor *= 2 
         else:
             logger.error(f"Error {response.status_code} while retrieving coordinates for {city}. Retrying...")
@@ -39,39 +54,12 @@ def get_osm_coordinates(city, country="Germany", cache=None, retries=5, backoff_
     logger.error(f"Failed to get coordinates for {city} after {retries} attempts.")
     return None, None
 
-# Function to load or create cache in the 'reporting' folder
-def load_cache(cache_file):
-    cache_folder = os.path.join(os.getcwd(), 'cache')
-    cache_file_path = os.path.join(cache_folder, cache_file)
-
-    if not os.path.exists(cache_folder):
-        os.makedirs(cache_folder)
-
-    if os.path.exists(cache_file_path):
-        logger.info(f"Loading cache from {cache_file_path}")
-        with open(cache_file_path, 'r') as f:
-            return json.load(f)
-    logger.info(f"No cache found. Starting fresh.")
-    return {}
-
-# Function to save cache to a file in the 'reporting' folder
-def save_cache(cache, cache_file):
-    cache_folder = os.path.join(os.getcwd(), 'cache')
-    cache_file_path = os.path.join(cache_folder, cache_file)
-
-    if not os.path.exists(cache_folder):
-        os.makedirs(cache_folder)
-
-    logger.info(f"Saving cache to {cache_file_path}")
-    with open(cache_file_path, 'w') as f:
-        json.dump(cache, f)
-
 # Function to generate and save the map
-def generate_germany_map(categorized_csv, output_image, cache_file='city_coords_cache.json'):
-    logger.info(f"Starting to generate map from {categorized_csv}")
+def generate_germany_map(categorized_artifact, output_image, cache_file='city_coords_cache.json'):
+    logger.info(f"Starting to generate map from {categorized_artifact}")
     
-    df = pd.read_csv(categorized_csv)
-    logger.info(f"Loaded CSV file with {len(df)} rows")
+    df = read_artifact(categorized_artifact, columns=['City', 'Country', 'RE_Strategy_Mask'])
+    logger.info(f"Loaded {len(df)} rows")
 
     df_germany = df[df['Country'] == 'Germany']
     logger.info(f"Filtered to {len(df_germany)} rows for Germany")
@@ -94,14 +82,13 @@ def generate_germany_map(categorized_csv, output_image, cache_file='city_coords_
             if lat and lon:
                 city_coords[city] = (lat, lon)
                 city_coords_cache[city] = (lat, lon)
-                # Only sleep when the API is hit, not for cached data
-                time.sleep(1)  
             else:
                 logger.warning(f"Skipping city {city} due to missing coordinates.")
 
     save_cache(city_coords_cache, cache_file)
 
-    city_counts = df_germany.groupby(['City', 'RE_Strategy_Names']).size().unstack(fill_value=0)
+    # Count every strategy of a company, not its combination of strategies
+    city_counts = explode_strategies(df_germany).groupby(['City', 'RE_Strategy_Name']).size().unstack(fill_value=0)
 
     # Load the Germany shapefile from the provided path
     logger.info("Loading Germany shapefile")
@@ -157,11 +144,11 @@ def generate_germany_map(categorized_csv, output_image, cache_file='city_coords_
         plt.show()
         logger.info(f"{strategy} map generation completed")
 
-def generate_germany_map_with_validation_disagree(categorized_csv, output_image, cache_file='city_coords_cache.json'):
-    logger.info(f"Starting to generate map from {categorized_csv}")
+def generate_germany_map_with_validation_disagree(categorized_artifact, output_image, cache_file='city_coords_cache.json'):
+    logger.info(f"Starting to generate map from {categorized_artifact}")
     
-    df = pd.read_csv(categorized_csv)
-    logger.info(f"Loaded CSV file with {len(df)} rows")
+    df = read_artifact(categorized_artifact, columns=['City', 'Country', 'RE_Strategy_Mask', 'openai_agreement'])
+    logger.info(f"Loaded {len(df)} rows")
 
     # Filter for rows where OpenAI disagrees
     df_germany_disagreed = df[(df['Country'] == 'Germany') & (df['openai_agreement'].str.contains('Disagree'))]
@@ -186,14 +173,13 @@ def generate_germany_map_with_validation_disagree(categorized_csv, output_image,
             if lat and lon:
                 city_coords[city] = (lat, lon)
                 city_coords_cache[city] = (lat, lon)
-                time.sleep(1)  # Rate-limiting
             else:
                 logger.warning(f"Skipping city {city} due to missing coordinates.")
 
     save_cache(city_coords_cache, cache_file)
 
-    # Group by City and RE_Strategy_Names
-    city_counts = df_germany_disagreed.groupby(['City', 'RE_Strategy_Names']).size().unstack(fill_value=0)
+    # Count every strategy of a company, not its combination of strategies
+    city_counts = explode_strategies(df_germany_disagreed).groupby(['City', 'RE_Strategy_Name']).size().unstack(fill_value=0)
 
     # Load the Germany shapefile
     logger.info("Loading Germany shapefile")
@@ -246,11 +232,11 @@ def generate_germany_map_with_validation_disagree(categorized_csv, output_image,
         plt.show()
         logger.info(f"{strategy} map generation completed")
 
-def generate_germany_map_with_validation_agree(categorized_csv, output_image, cache_file='city_coords_cache.json'):
-    logger.info(f"Starting to generate map from {categorized_csv}")
+def generate_germany_map_with_validation_agree(categorized_artifact, output_image, cache_file='city_coords_cache.json'):
+    logger.info(f"Starting to generate map from {categorized_artifact}")
     
-    df = pd.read_csv(categorized_csv)
-    logger.info(f"Loaded CSV file with {len(df)} rows")
+    df = read_artifact(categorized_artifact, columns=['City', 'Country', 'RE_Strategy_Mask', 'openai_agreement'])
+    logger.info(f"Loaded {len(df)} rows")
 
     # Filter for rows where OpenAI agrees
     df_germany_agreed = df[(df['Country'] == 'Germany') & (df['openai_agreement'].str.contains('Agree'))]
@@ -275,14 +261,13 @@ def generate_germany_map_with_validation_agree(categorized_csv, output_image, ca
             if lat and lon:
                 city_coords[city] = (lat, lon)
                 city_coords_cache[city] = (lat, lon)
-                time.sleep(1)  # Rate-limiting
             else:
                 logger.warning(f"Skipping city {city} due to missing coordinates.")
 
     save_cache(city_coords_cache, cache_file)
 
-    # Group by City and RE_Strategy_Names
-    city_counts = df_germany_agreed.groupby(['City', 'RE_Strategy_Names']).size().unstack(fill_value=0)
+    # Count every strategy of a company, not its combination of strategies
+    city_counts = explode_strategies(df_germany_agreed).groupby(['City', 'RE_Strategy_Name']).size().unstack(fill_value=0)
 
     # Load the Germany shapefile
     logger.info("Loading Germany shapefile")
@@ -1,22 +1,34 @@
-import os
-import json
-import pandas as pd
+from bigquery.batch_uploader import BatchUploader
 from bigquery.client import BigQueryClient
+from bigquery.job_config import VALIDATION_CONFIG
+from bigquery.schemes.validation_schema import VALIDATION_SCHEMA
 from logger import Logger as logger
+from helpers.artifacts import read_artifact, write_artifact
+from helpers.cache import load_cache, save_cache
 from company_keywords.keywords import Keywords
+from company_keywords.matcher import strategy_codes
 from openai_request.client import OpenAIClient
 from openai_request.openai_requests_prompt import construct_prompt
 from tasks.mapping import generate_germany_map
 
-def run_job(client: OpenAIClient, bqclient: BigQueryClient, upload=False):
+VALIDATION_TABLE = "Crunchbasevalidation"
 
-    #TODO bigquery upload
-    # Process the CSV and add the OpenAI responses
-    input_csv = 'reporting/categorized_crunchbase_with_address.csv'
-    output_csv = 'reporting/categorized_crunchbase_with_openai_responses.csv'
+
+def run_job(client: OpenAIClient, bqclient: BigQueryClient, upload=False, batch_rows=None, flush_seconds=None):
+
+    # Process the categorized companies and add the OpenAI responses
+    input_artifact = 'categorized_crunchbase_with_address'
+    output_artifact = 'categorized_crunchbase_with_openai_responses'
     re_strategies = Keywords.re_strategies
 
-    process_csv_and_save(input_csv, output_csv, re_strategies, client)
+    # validated rows are uploaded while the validation is still running
+    uploader = BatchUploader(bqclient, VALIDATION_TABLE, VALIDATION_SCHEMA, VALIDATION_CONFIG,
+                             batch_rows, flush_seconds) if upload else None
+    try:
+        process_and_save(input_artifact, output_artifact, re_strategies, client, uploader=uploader)
+    finally:
+        if uploader:
+            uploader.close()
 
 def validate_columns(df, required_columns):
     """
@@ -44,54 +56,28 @@ def handle_row_error(row, error_message):
     logger.error(f"Error processing row: {row}. Error: {error_message}")
     return "Error in OpenAI response"
 
-# Function to load or create cache in the 'reporting' folder
-def load_cache(cache_file):
-    cache_folder = os.path.join(os.getcwd(), 'cache')
-    cache_file_path = os.path.join(cache_folder, cache_file)
-
-    if not os.path.exists(cache_folder):
-        os.makedirs(cache_folder)
-
-    if os.path.exists(cache_file_path):
-        logger.info(f"Loading cache from {cache_file_path}")
-        with open(cache_file_path, 'r') as f:
-            return json.load(f)
-    logger.info(f"No cache found. Starting fresh.")
-    return {}
-
-# Function to save cache to a file in the 'reporting' folder
-def save_cache(cache, cache_file):
-    cache_folder = os.path.join(os.getcwd(), 'cache')
-    cache_file_path = os.path.join(cache_folder, cache_file)
-
-    if not os.path.exists(cache_folder):
-        os.makedirs(cache_folder)
-
-    logger.info(f"Saving cache to {cache_file_path}")
-    with open(cache_file_path, 'w') as f:
-        json.dump(cache, f)
-
 def get_cache_key(company_name, city, country, strategy_code):
     """
     Generate a unique cache key based on company name, city, country, and strategy code.
     """
     return f"{company_name}_{city}_{country}_{strategy_code}"
 
-def process_csv_and_save(input_csv, output_csv, strategy_dict, openai_client, cache_file='openai_cache.json'):
+def process_and_save(input_artifact, output_artifact, strategy_dict, openai_client, cache_file='openai_cache.json', uploader=None):
     """
-    Reads the categorized Crunchbase CSV, sends each entry to OpenAI, and adds the strategy code and term or a disagreement message
-    as new columns 'openai_agreement', 'openai_strategy', and 'openai_explanation'. Saves the new DataFrame to a CSV, using caching.
+    Reads the categorized Crunchbase artifact, sends each entry to OpenAI, and adds the strategy code and term or a disagreement message
+    as new columns 'openai_agreement', 'openai_strategy', and 'openai_explanation'. Saves the new DataFrame as artifact, using caching.
+    With an uploader, every finished row is also handed to it.
     """
-    logger.info(f"Loading data from {input_csv}")
+    logger.info(f"Loading data from {input_artifact}")
     
     # Load the cache
     cache = load_cache(cache_file)
     
-    # Read the input CSV
-    df = pd.read_csv(input_csv)
+    # Read the input artifact
+    df = read_artifact(input_artifact)
 
     # Validate if required columns exist
-    required_columns = ['Company_Name', 'City', 'Country', 'RE_Strategy_Codes', 'RE_Strategy_Names', 'Short_Description']
+    required_columns = ['Company_Name', 'City', 'Country', 'RE_Strategy_Mask', 'Short_Description']
     if not validate_columns(df, required_columns):
         return
     
@@ -106,7 +92,7 @@ def process_csv_and_save(input_csv, output_csv, strategy_dict, openai_client, ca
             company_name = row['Company_Name']
             city = row['City']
             country = row['Country']
-            strategy_codes = row['RE_Strategy_Codes'].split(", ")
+            codes = strategy_codes(row['RE_Strategy_Mask'], strategy_dict)
             short_description = row['Short_Description']
 
             # Initialize lists to store responses for this row
@@ -115,7 +101,7 @@ def process_csv_and_save(input_csv, output_csv, strategy_dict, openai_client, ca
             row_explanations = []
 
             # Iterate over each strategy code
-            for strategy_code in strategy_codes:
+            for strategy_code in codes:
                 # Validate strategy code
                 if not validate_strategy_code(strategy_code, strategy_dict):
                     row_agreements.append("Invalid")
@@ -151,14 +137,17 @@ def process_csv_and_save(input_csv, output_csv, strategy_dict, openai_client, ca
                 row_explanations.append(explanation)
 
             # Combine responses for this row into a single string
-            openai_agreements.append(", ".join(row_agreements))
-            openai_strategies.append(", ".join(row_strategies))
-            openai_explanations.append(", ".join(row_explanations))
+            agreement, strategy, explanation = ", ".join(row_agreements), ", ".join(row_strategies), ", ".join(row_explanations)
 
         except Exception as e:
-            openai_agreements.append("Error")
-            openai_strategies.append("Error")
-            openai_explanations.append(handle_row_error(row, str(e)))
+            agreement, strategy, explanation = "Error", "Error", handle_row_error(row, str(e))
+
+        openai_agreements.append(agreement)
+        openai_strategies.append(strategy)
+        openai_explanations.append(explanation)
+        if uploader:
+            uploader.add({**row.to_dict(), 'openai_agreement': agreement, 'openai_strategy': strategy,
+                          'openai_explanation': explanation})
 
     # Validate that the number of responses matches the number of rows
     if len(openai_agreements) != len(df):
@@ -169,9 +158,9 @@ def process_csv_and_save(input_csv, output_csv, strategy_dict, openai_client, ca
     df['openai_strategy'] = openai_strategies
     df['openai_explanation'] = openai_explanations
 
-    # Save the updated DataFrame to the output CSV
-    logger.info(f"Saving new CSV with OpenAI responses to {output_csv}")
-    df.to_csv(output_csv, index=False)
+    # Save the updated DataFrame to the output artifact
+    logger.info(f"Saving OpenAI responses to {output_artifact}")
+    write_artifact(df, output_artifact)
 
     # Explicitly delete the DataFrame and clear memory
     del df
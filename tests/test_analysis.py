@@ -0,0 +1,50 @@
+import pandas as pd
+
+from helpers.artifacts import read_artifact, write_artifact
+from tasks import analysis
+
+COMPANIES = pd.DataFrame({
+    'UUID': [f"uuid-{i}" for i in range(8)],
+    'Name': [f"Company {i}" for i in range(8)],
+    'Short_Description': [
+        "Software for banks",
+        "Online marketplace",
+        None,
+        "We repair and recycle phones",
+        "Furniture we refurbish",
+        "Consulting",
+        "Reuse of packaging",
+        "Logistics",
+    ],
+    'City': ["Berlin", "Munich", None, "Berlin", "Hamburg", "Cologne", "Berlin", None],
+    'Region': [None, None, None, "Berlin", None, None, "Berlin", None],
+    'Country': ["Germany"] * 8,
+})
+
+
+def test_streaming_with_uncategorized_first_chunk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_artifact(COMPANIES, "crunchbase")
+
+    analysis.run_job(use_cache=False)
+    expected = read_artifact(analysis.CATEGORIZED_ARTIFACT)
+
+    # the first chunk has no categorized company and an empty Region column
+    analysis.run_job(use_cache=False, stream=True, stream_rows=3)
+    streamed = read_artifact(analysis.CATEGORIZED_ARTIFACT)
+
+    assert streamed['Company_Name'].tolist() == ["Company 3", "Company 4", "Company 6"]
+    assert streamed['RE_Strategy_Codes'].tolist() == ["R4, R8", "R5", "R3"]
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+
+
+def test_streaming_from_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reporting").mkdir()
+    COMPANIES.to_csv(tmp_path / "reporting" / "crunchbase.csv", index=False)
+
+    analysis.run_job(use_cache=True, stream=True, stream_rows=3)
+    streamed = read_artifact(analysis.CATEGORIZED_ARTIFACT)
+
+    assert streamed['Company_Name'].tolist() == ["Company 3", "Company 4", "Company 6"]
+    assert streamed['RE_Strategy_Mask'].tolist() == [(1 << 4) | (1 << 8), 1 << 5, 1 << 3]
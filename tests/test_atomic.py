@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from helpers.artifacts import read_artifact, write_artifact
+from helpers.atomic import atomic_write
+
+
+def test_failed_write_keeps_previous_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    with atomic_write(path) as tmp, open(tmp, 'w') as f:
+        f.write("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as tmp, open(tmp, 'w') as f:
+            f.write("half")
+            raise RuntimeError("interrupted")
+
+    assert open(path).read() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_interrupted_artifact_keeps_previous_one(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_artifact(pd.DataFrame({'UUID': ["uuid-0"]}), "crunchbase")
+
+    def interrupted(self, path, **kwargs):
+        open(path, 'wb').write(b"PAR1")
+        raise KeyboardInterrupt
+    with monkeypatch.context() as patch, pytest.raises(KeyboardInterrupt):
+        patch.setattr(pd.DataFrame, "to_parquet", interrupted)
+        write_artifact(pd.DataFrame({'UUID': ["uuid-1"]}), "crunchbase")
+
+    assert read_artifact("crunchbase")['UUID'].tolist() == ["uuid-0"]
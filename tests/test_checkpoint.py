@@ -0,0 +1,43 @@
+import json
+from datetime import datetime, timedelta
+
+from crunchbase.checkpoint import CrawlCheckpoint
+
+QUERY = {"field_ids": ["name"], "query": []}
+
+
+def crawl_one_page(directory):
+    checkpoint = CrawlCheckpoint(QUERY, directory)
+    checkpoint.save_page([{"uuid": "uuid-0"}])
+    return checkpoint
+
+
+def test_recent_checkpoint_is_resumed(tmp_path):
+    crawl_one_page(tmp_path)
+
+    checkpoint = CrawlCheckpoint(QUERY, tmp_path)
+
+    assert checkpoint.state["after_id"] == "uuid-0"
+    assert list(checkpoint.pages()) == [[{"uuid": "uuid-0"}]]
+
+
+def test_old_checkpoint_is_discarded(tmp_path):
+    checkpoint = crawl_one_page(tmp_path)
+    checkpoint.state["created_at"] = (datetime.now() - timedelta(hours=25)).isoformat()
+    with open(checkpoint.state_file, 'w') as f:
+        json.dump(checkpoint.state, f)
+
+    checkpoint = CrawlCheckpoint(QUERY, tmp_path, max_age_hours=24)
+
+    assert checkpoint.state["after_id"] is None
+    assert checkpoint.state["pages"] == 0
+    assert list(checkpoint.pages()) == []
+
+
+def test_checkpoint_without_age_is_discarded(tmp_path):
+    checkpoint = crawl_one_page(tmp_path)
+    del checkpoint.state["created_at"]
+    with open(checkpoint.state_file, 'w') as f:
+        json.dump(checkpoint.state, f)
+
+    assert CrawlCheckpoint(QUERY, tmp_path).state["pages"] == 0
@@ -0,0 +1,124 @@
+import json
+import numpy as np
+import pandas as pd
+
+from crunchbase.crunchbase_query import CRUNCHBASE_QUERY
+from crunchbase.stub_server import EUROPE_UUID, GERMANY_UUID, SyntheticOrganizations, create_app
+from tasks.crunchbase import created_at_partitions, extract_locations, get_data_partitioned, location_partitions
+
+ORGANIZATIONS = SyntheticOrganizations(2500)
+
+
+class StubClient():
+    """ Sends the searches to the in-process Crunchbase stand-in """
+
+    def __init__(self, organizations):
+        self.app = create_app(organizations).test_client()
+
+    def get_data(self, query, after_id=None, limit=1000):
+        body = {**query, "limit": limit}
+        if after_id:
+            body["after_id"] = after_id
+        return self.app.post("/searches/organizations", json=body).get_json()
+
+
+def test_created_at_partitions_cover_the_query_once():
+    partitions = created_at_partitions(CRUNCHBASE_QUERY, start_year=2010, end_year=2020)
+
+    bounds = [[(p["operator_id"], p["values"][0]) for p in partition["query"] if p["field_id"] == "created_at"]
+              for partition in partitions]
+    assert bounds[0] == [("lt", "2010-01-01")]
+    assert bounds[1] == [("gte", "2010-01-01"), ("lt", "2011-01-01")]
+    assert bounds[-1] == [("gte", "2020-01-01")]
+    assert len(partitions) == 12
+    # every organization falls into exactly one partition
+    indexes = np.concatenate([ORGANIZATIONS.matching(partition["query"]) for partition in partitions])
+    assert len(indexes) == ORGANIZATIONS.count
+    assert len(np.unique(indexes)) == ORGANIZATIONS.count
+
+
+def test_location_partitions_replace_the_location_filter():
+    partitions = location_partitions(CRUNCHBASE_QUERY, ["region-1", "region-2"])
+
+    locations = [[p["values"] for p in partition["query"] if p["field_id"] == "location_identifiers"]
+                 for partition in partitions]
+    assert locations == [[["region-1"]], [["region-2"]]]
+
+
+def test_partitioned_crawl_matches_single_crawl():
+    client = StubClient(ORGANIZATIONS)
+
+    df = get_data_partitioned(client, created_at_partitions(CRUNCHBASE_QUERY), workers=4)
+
+    assert len(df) == ORGANIZATIONS.count
+    assert set(df['UUID']) == {ORGANIZATIONS.uuid(index) for index in range(ORGANIZATIONS.count)}
+
+
+def test_overlapping_partitions_are_deduplicated():
+    client = StubClient(ORGANIZATIONS)
+    # the stand-in lists every organization in Germany and in Europe
+    partitions = location_partitions(CRUNCHBASE_QUERY, [GERMANY_UUID, EUROPE_UUID])
+
+    df = get_data_partitioned(client, partitions, workers=2)
+
+    assert len(df) == ORGANIZATIONS.count
+    assert df['UUID'].is_unique
+    assert df['UUID'].tolist() == [ORGANIZATIONS.uuid(index) for index in range(ORGANIZATIONS.count)]
+
+
+def extract_location_data(row):
+    """ The per-row extraction extract_locations replaced, kept as reference """
+    try:
+        if isinstance(row, list):
+            location_data = row
+        else:
+            location_data = json.loads(row.replace("'", "\""))
+        city = next((item['value'] for item in location_data if item["location_type"] == "city"), None)
+        region = next((item['value'] for item in location_data if item["location_type"] == "region"), None)
+        country = next((item['value'] for item in location_data if item["location_type"] == "country"), None)
+        continent = next((item['value'] for item in location_data if item["location_type"] == "continent"), None)
+        return pd.Series([city, region, country, continent], index=['City', 'Region', 'Country', 'Continent'])
+    except Exception:
+        return pd.Series([None, None, None, None], index=['City', 'Region', 'Country', 'Continent'])
+
+
+def location(location_type, value):
+    return {"uuid": f"{location_type}-{value}", "value": value, "location_type": location_type,
+            "entity_def_id": "location"}
+
+
+BERLIN = [location("city", "Berlin"), location("region", "Berlin"), location("country", "Germany"),
+          location("continent", "Europe")]
+LOCATIONS = pd.Series([
+    BERLIN,
+    # no region
+    [location("city", "Hamburg"), location("country", "Germany"), location("continent", "Europe")],
+    # the first of two cities wins
+    [location("city", "Munich"), location("city", "Garching"), location("region", "Bayern")],
+    [],
+    None,
+    float("nan"),
+    # read back from a CSV
+    str(BERLIN),
+], index=[10, 11, 12, 13, 14, 15, 16])
+
+
+def test_extract_locations_matches_per_row_extraction():
+    expected = LOCATIONS.apply(extract_location_data)
+
+    locations = extract_locations(LOCATIONS)
+
+    assert locations.index.tolist() == LOCATIONS.index.tolist()
+    assert locations.columns.tolist() == ['City', 'Region', 'Country', 'Continent']
+    pd.testing.assert_frame_equal(locations.astype(object).where(locations.notna(), None),
+                                  expected.astype(object).where(expected.notna(), None))
+
+
+def test_extract_locations_keeps_apostrophes_from_csv():
+    # the per-row extraction lost every location of such a row
+    sankt_augustin = [location("city", "Sankt Augustin's"), location("region", "Nordrhein-Westfalen"),
+                      location("country", "Germany"), location("continent", "Europe")]
+
+    locations = extract_locations(pd.Series([str(sankt_augustin)]))
+
+    assert locations.loc[0].tolist() == ["Sankt Augustin's", "Nordrhein-Westfalen", "Germany", "Europe"]
@@ -0,0 +1,121 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+import pytest
+import requests
+
+from helpers import decorators
+from helpers.decorators import FatalError, RetryableError, get_retry_after, is_retryable, retry
+from helpers.rate_limit import get_bucket
+
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(response=response)
+
+
+class Flaky():
+    """ Fails with the given errors before it succeeds """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    @retry(max_retries=3, retry_delay=1, deadline=10)
+    def call(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    slept = []
+    monkeypatch.setattr(decorators.time, "sleep", slept.append)
+    return slept
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.ConnectionError("reset"),
+    requests.exceptions.ReadTimeout("slow"),
+    RetryableError("CS151"),
+    http_error(429),
+    http_error(409),
+    http_error(503),
+])
+def test_transient_errors_are_retryable(error):
+    assert is_retryable(error)
+
+
+@pytest.mark.parametrize("error", [
+    FatalError("invalid credentials"),
+    http_error(400),
+    http_error(401),
+    http_error(404),
+    KeyError("count"),
+    TypeError("unsupported operand"),
+])
+def test_other_errors_are_not_retryable(error):
+    assert not is_retryable(error)
+
+
+def test_retry_after_header():
+    assert get_retry_after(http_error(429, {"Retry-After": "7"})) == 7.0
+    in_a_minute = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 55 < get_retry_after(http_error(503, {"Retry-After": format_datetime(in_a_minute, usegmt=True)})) <= 60
+    assert get_retry_after(RetryableError("CS151", retry_after=3)) == 3.0
+    assert get_retry_after(http_error(503)) is None
+
+
+def test_transient_error_is_retried(no_sleep):
+    flaky = Flaky(requests.exceptions.ConnectionError("reset"), http_error(429, {"Retry-After": "2"}))
+
+    assert flaky.call() == "ok"
+    assert flaky.calls == 3
+    assert no_sleep[1] == 2.0
+
+
+def test_fatal_error_is_raised_at_once(no_sleep):
+    flaky = Flaky(FatalError("invalid credentials"))
+
+    with pytest.raises(FatalError):
+        flaky.call()
+    assert flaky.calls == 1
+    assert no_sleep == []
+
+
+def test_bug_is_raised_at_once():
+    flaky = Flaky(KeyError("count"))
+
+    with pytest.raises(KeyError):
+        flaky.call()
+    assert flaky.calls == 1
+
+
+def test_retries_stop_at_max_retries():
+    flaky = Flaky(*[http_error(503)] * 3)
+
+    with pytest.raises(requests.HTTPError):
+        flaky.call()
+    assert flaky.calls == 3
+
+
+def test_retries_stop_at_deadline(no_sleep):
+    flaky = Flaky(RetryableError("CS151", retry_after=30))
+
+    with pytest.raises(RetryableError):
+        flaky.call()
+    assert flaky.calls == 1
+    assert no_sleep == []
+
+
+def test_bucket_keeps_first_rate(capsys):
+    bucket = get_bucket("test_upstream", 2.0)
+
+    assert get_bucket("test_upstream", 2.0) is bucket
+    assert "rate limit" not in capsys.readouterr().out
+    assert get_bucket("test_upstream", 5.0) is bucket
+    assert bucket.rate == 2.0
+    assert "rate limit stays at 120 requests per minute, 300 requested" in capsys.readouterr().out
@@ -0,0 +1,41 @@
+from datetime import datetime
+import pandas as pd
+
+from helpers.artifacts import write_artifact
+from helpers.snapshots import diff_snapshots, snapshot_artifact
+
+COMPANIES = pd.DataFrame({
+    'UUID': ["uuid-0", "uuid-1", "uuid-2"],
+    'Name': ["Company 0", "Company 1", "Company 2"],
+    'City': ["Berlin", "Munich", "Hamburg"],
+})
+
+
+def store_snapshot(df, run_date):
+    # every run loads with its own dwh_partitiondate
+    write_artifact(df.assign(dwh_partitiondate=datetime.fromisoformat(run_date)), "crunchbase")
+    snapshot_artifact("crunchbase", run_date)
+
+
+def test_identical_snapshots_have_no_diff(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store_snapshot(COMPANIES, "2024-06-01")
+    store_snapshot(COMPANIES, "2024-07-01")
+
+    diff = diff_snapshots("crunchbase", "2024-06-01", "2024-07-01")
+
+    assert diff.empty
+
+
+def test_one_changed_field_is_one_changed_row(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store_snapshot(COMPANIES, "2024-06-01")
+    changed = COMPANIES.copy()
+    changed.loc[1, 'City'] = "Cologne"
+    store_snapshot(changed, "2024-07-01")
+
+    diff = diff_snapshots("crunchbase", "2024-06-01", "2024-07-01")
+
+    assert diff['change'].tolist() == ["changed"]
+    assert diff['UUID'].tolist() == ["uuid-1"]
+    assert diff['City'].tolist() == ["Cologne"]
@@ -0,0 +1,66 @@
+from datetime import datetime
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from bigquery.job_config import CRUNCHBASE_CONFIG
+from bigquery.local_client import LocalBigQueryClient
+from bigquery.schemes.crunchbase_schema import CRUNCHBASE_SCHEMA
+
+FIRST_RUN = datetime(2024, 6, 1)
+SECOND_RUN = datetime(2024, 7, 1)
+
+
+def companies(run, rows):
+    return pd.DataFrame({
+        'dwh_partitiondate': run,
+        'UUID': [uuid for uuid, _, _ in rows],
+        'Name': [name for _, name, _ in rows],
+        'City': [city for _, _, city in rows],
+        'Rank_Org': list(range(1, len(rows) + 1)),
+    })
+
+
+def read_companies(client):
+    return client.get_dataframe(
+        "SELECT UUID, Name, City, dwh_partitiondate FROM local.Companies ORDER BY UUID"
+    ).set_index('UUID')
+
+
+def test_upsert_updates_changed_inserts_new_and_keeps_unchanged_rows():
+    client = LocalBigQueryClient("local", "local", database=":memory:")
+    assert client.upsert_dataframe(companies(FIRST_RUN, [
+        ("uuid-0", "Company 0", "Berlin"),
+        ("uuid-1", "Company 1", "Munich"),
+    ]), "Companies", CRUNCHBASE_CONFIG, CRUNCHBASE_SCHEMA)
+
+    assert client.upsert_dataframe(pd.concat([
+        companies(SECOND_RUN, [
+            ("uuid-0", "Company 0", "Berlin"),
+            ("uuid-1", "Company 1", "Cologne"),
+            ("uuid-2", "Company 2", "Bremen"),
+        ]),
+        # a company listed twice keeps its newest row
+        companies(FIRST_RUN, [("uuid-2", "Company 2", "Hamburg")]),
+    ]), "Companies", CRUNCHBASE_CONFIG, CRUNCHBASE_SCHEMA)
+
+    stored = read_companies(client)
+    assert stored.index.tolist() == ["uuid-0", "uuid-1", "uuid-2"]
+    assert stored['City'].tolist() == ["Berlin", "Cologne", "Bremen"]
+    # dwh_partitiondate holds the time of the last change of a row
+    assert stored['dwh_partitiondate'].tolist() == [FIRST_RUN, SECOND_RUN, SECOND_RUN]
+
+
+def test_merge_query_reports_only_written_rows():
+    client = LocalBigQueryClient("local", "local", database=":memory:")
+    rows = [("uuid-0", "Company 0", "Berlin"), ("uuid-1", "Company 1", "Munich")]
+    client.upsert_dataframe(companies(FIRST_RUN, rows), "Companies", CRUNCHBASE_CONFIG, CRUNCHBASE_SCHEMA)
+
+    staging = client.create_staging_table("Companies", CRUNCHBASE_SCHEMA)
+    client.load_dataframe_in_chunks(companies(SECOND_RUN, rows + [("uuid-2", "Company 2", "Hamburg")]),
+                                    staging.table_id, CRUNCHBASE_CONFIG, CRUNCHBASE_SCHEMA)
+    job = client.execute_query(client.merge_query("Companies", staging.table_id, CRUNCHBASE_SCHEMA))
+
+    assert job.num_dml_affected_rows == 1
+    assert read_companies(client).loc["uuid-0", 'dwh_partitiondate'] == FIRST_RUN